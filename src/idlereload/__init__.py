@@ -25,8 +25,6 @@ __author__ = "CoolCat467"
 __license__ = "GNU General Public License Version 3"
 __version__ = "0.2.0"
 
-import difflib
-import importlib
 import os
 import sys
 import time
@@ -34,25 +32,100 @@ import traceback
 from contextlib import contextmanager
 from functools import wraps
 from idlelib.config import idleConf
+from idlelib.textview import view_text
+from idlelib.undo import CommandSequence
 from pathlib import Path
-from tkinter import Event, Misc, Text, messagebox
+from tkinter import RIGHT, Event, Misc, Text, filedialog, messagebox
 from tkinter.messagebox import askyesno
-from typing import TYPE_CHECKING, Any, ClassVar, TypeVar
+from typing import TYPE_CHECKING, Any, ClassVar, TypeAlias, TypeVar, cast
+from weakref import WeakKeyDictionary
+
+from idlereload.diff import DIFF_ENGINES
+from idlereload.edits import (
+    GRANULARITY_PATTERNS,
+    EditGuard,
+    apply_edits,
+    bypass_filters,
+    changed_lines,
+    changed_ranges,
+    map_line,
+    split_lines,
+    verify_text,
+)
+from idlereload.extensions import (
+    changed_sources,
+    precompile,
+    reload_changed,
+    remember_modules,
+)
+from idlereload.handlers import handler_report, time_extension_handlers
+from idlereload.history import trim_undo
+from idlereload.log import get_log_writer
+from idlereload.menus import extension_ui, update_extension_ui
+from idlereload.shell import reload_in_subprocess
+from idlereload.snapshot import (
+    Snapshot,
+    forget_snapshot,
+    get_snapshot,
+    store_snapshot,
+)
+from idlereload.stats import (
+    PhaseTimer,
+    export_json_lines,
+    get_records,
+    summarize,
+)
+from idlereload.watch import (
+    StatSignature,
+    forget_stat,
+    get_signature,
+    get_watcher,
+    signature_changed,
+)
+from idlereload.worker import (
+    compute_reload_plan,
+    hash_file,
+    submit_reload_plan,
+    submit_snapshot,
+)
 
 if TYPE_CHECKING:
-    from collections.abc import Callable, Generator, Mapping
+    from collections.abc import (
+        Callable,
+        Collection,
+        Generator,
+        Mapping,
+        Sequence,
+    )
+    from concurrent.futures import Future
+    from idlelib.editor import EditorWindow
     from idlelib.iomenu import IOBinding
     from idlelib.pyshell import PyShellEditorWindow
     from idlelib.undo import UndoDelegator
-    from types import ModuleType
 
     from typing_extensions import ParamSpec
 
+    from idlereload.diff import Opcode
+    from idlereload.edits import Edit
+    from idlereload.menus import ExtensionUI
+    from idlereload.watch import Watcher
+    from idlereload.worker import ReloadPlan
+
     PS = ParamSpec("PS")
+    # (filename, content digest, buffer state) of last load or save
+    Fingerprint: TypeAlias = tuple[str, bytes, tuple[int, object]]
 
 
 T = TypeVar("T")
+# How often to check if background work finished
+POLL_INTERVAL_MS = 10
 LOG_PATH = Path(idleConf.userdir) / "logs" / f"{__title__}.log"
+# Window -> (fingerprint, stat signature) of its file, kept across reloads
+# of this module, so reloading extensions never forgets what buffers hold
+_FILE_STATES: WeakKeyDictionary[
+    EditorWindow,
+    tuple[Fingerprint | None, StatSignature | None],
+] = globals().get("_FILE_STATES", WeakKeyDictionary())
 
 
 def debug(message: str, save_to_logfile: bool = True) -> None:
@@ -180,16 +253,6 @@ def ensure_values_exist_in_section(
     return need_save
 
 
-@contextmanager
-def undo_block(undo: UndoDelegator) -> Generator[None, None, None]:
-    """Undo block context manager."""
-    undo.undo_block_start()
-    try:
-        yield None
-    finally:
-        undo.undo_block_stop()
-
-
 @contextmanager
 def temporary_overwrite(
     object_: object,
@@ -209,15 +272,11 @@ def temporary_overwrite(
 
 
 def extension_log(content: str) -> None:
-    """Log content to extension log."""
-    if not LOG_PATH.exists():
-        LOG_PATH.parent.mkdir(exist_ok=True)
-    with LOG_PATH.open("a", encoding="utf-8") as fp:
-        format_time = time.strftime("[%Y-%m-%d %H:%M:%S] ")
-        for line in content.splitlines(keepends=True):
-            fp.write(f"{format_time}{line}")
-        if not line.endswith("\n"):
-            fp.write("\n")
+    """Log content to extension log.
+
+    Written by a background thread, so this never waits on the disk.
+    """
+    get_log_writer(LOG_PATH).write(content)
 
 
 def extension_log_exception(exc: BaseException) -> None:
@@ -256,12 +315,78 @@ def log_exceptions_catch(function: Callable[PS, T]) -> Callable[PS, T | None]:
     return wrapper
 
 
-def get_mtime(filename: str) -> float | None:
-    """Return mtime or None on OSError."""
+def config_int(value: str, default: int) -> int:
+    """Return configuration value as integer, default if invalid."""
     try:
-        return os.path.getmtime(filename)
-    except OSError:
-        return None
+        return int(value)
+    except ValueError:
+        debug(f"Invalid integer option {value!r}, using {default}", False)
+        return default
+
+
+def user_config_signatures() -> tuple[StatSignature | None, ...]:
+    """Return stat signatures of every user configuration file."""
+    return tuple(
+        get_signature(idleConf.userCfg[config_type].file, 0)
+        for config_type in sorted(idleConf.userCfg)
+    )
+
+
+def report_slow_handler(extension: str, handler: str, seconds: float) -> None:
+    """Report event handler call that took longer than the threshold."""
+    debug(f"Slow event handler {extension}.{handler}: {seconds * 1000:.1f} ms")
+
+
+def noop(*args: Any, **kwargs: Any) -> None:
+    """Do nothing."""
+
+
+def extension_modules(editwin: EditorWindow) -> list[str]:
+    """Return names of loaded modules of extensions of window."""
+    return [name for name in editwin.extensions if name in sys.modules]
+
+
+def teardown_extensions(editwin: EditorWindow) -> list[str]:
+    """Close every extension of window.
+
+    Key bindings and menus are left alone, load_extensions updates
+    them. Return names of extension modules, for reloading them.
+    """
+    for extension in editwin.extensions.values():
+        try:
+            if hasattr(extension, "close"):
+                extension.close()
+        except Exception as exc:
+            traceback.print_exception(exc)
+            extension_log_exception(exc)
+
+        try:
+            if hasattr(extension, "on_reloading"):
+                extension.on_reloading()
+        except Exception as exc:
+            traceback.print_exception(exc)
+            extension_log_exception(exc)
+
+    roots = extension_modules(editwin)
+    editwin.extensions.clear()
+    return roots
+
+
+def load_extensions(
+    editwin: EditorWindow,
+    old_ui: Mapping[str, ExtensionUI],
+) -> None:
+    """Load extensions of window again.
+
+    Instead of adding every menu entry and key binding again, only the
+    ones that differ from old_ui, taken before teardown, are changed.
+    """
+    with (
+        temporary_overwrite(editwin, "fill_menus", noop),
+        temporary_overwrite(editwin, "apply_bindings", noop),
+    ):
+        editwin.load_extensions()
+    update_extension_ui(editwin, old_ui, extension_ui(editwin))
 
 
 # Important weird: If event handler function returns 'break',
@@ -273,12 +398,21 @@ class idlereload:  # noqa: N801
     """Reload file contents without restarting IDLE."""
 
     __slots__ = (
+        "apply_index",
+        "applying",
         "direct_binds",
         "editwin",
         "files",
-        "last_mtime",
+        "fingerprint",
+        "last_signature",
+        "original_writefile",
+        "pending",
+        "pending_snapshot",
+        "reload_shell_after",
         "text",
+        "timer",
         "undo",
+        "watched",
     )
     # Extend the file and format menus.
     menudefs: ClassVar = [
@@ -287,7 +421,19 @@ class idlereload:  # noqa: N801
             [
                 None,
                 ("_Reload File", "<<reload-file>>"),
+                ("Reload File Into S_hell", "<<idlereload-reload-shell>>"),
                 ("Reload _Extensions", "<<idlereload-reload-extensions>>"),
+                (
+                    "Reload Extensions E_verywhere",
+                    "<<idlereload-reload-extensions-everywhere>>",
+                ),
+                ("Cancel Reloa_d", "<<idlereload-cancel-reload>>"),
+                ("Reload Stat_istics", "<<idlereload-reload-statistics>>"),
+                (
+                    "Export Re_load Stats",
+                    "<<idlereload-export-statistics>>",
+                ),
+                ("Slo_w Event Handlers", "<<idlereload-handler-report>>"),
             ],
         ),
     ]
@@ -296,13 +442,65 @@ class idlereload:  # noqa: N801
         "enable": "True",
         "enable_editor": "True",
         "enable_shell": "False",
+        "diff_engine": "patience",
+        "edit_granularity": "line",
+        "diff_budget_ms": "1000",
+        "diff_max_cost": "20000000",
+        "verify_edits": "False",
+        "background_diff": "True",
+        "process_threshold_kb": "8192",
+        "max_reload_kb": "65536",
+        "progressive_threshold_lines": "5000",
+        "slice_ms": "15",
+        "undo_reload_kb": "8192",
+        "snapshot_cache_kb": "32768",
+        "stats_history": "500",
+        "time_handlers": "False",
+        "slow_handler_ms": "100",
+        "handler_sort": "max",
+        "watch_files": "False",
+        "watch_action": "prompt",
+        "watch_debounce_ms": "50",
+        "watch_backend": "auto",
+        "reload_shell": "False",
     }
     # Default key binds for configuration file
     bind_defaults: ClassVar = {
         "reload-file": "<Control-Shift-Key-R>",
+        "idlereload-reload-shell": None,
         "idlereload-reload-extensions": None,
+        "idlereload-reload-extensions-everywhere": None,
+        "idlereload-cancel-reload": None,
+        "idlereload-reload-statistics": None,
+        "idlereload-export-statistics": None,
+        "idlereload-handler-report": None,
     }
 
+    # Overwritten in reload
+    diff_engine = "patience"
+    edit_granularity = "line"
+    diff_budget_ms = "1000"
+    diff_max_cost = "20000000"
+    verify_edits = "False"
+    background_diff = "True"
+    process_threshold_kb = "8192"
+    max_reload_kb = "65536"
+    progressive_threshold_lines = "5000"
+    slice_ms = "15"
+    undo_reload_kb = "8192"
+    snapshot_cache_kb = "32768"
+    stats_history = "500"
+    time_handlers = "False"
+    slow_handler_ms = "100"
+    handler_sort = "max"
+    watch_files = "False"
+    watch_action = "prompt"
+    watch_debounce_ms = "50"
+    watch_backend = "auto"
+    reload_shell = "False"
+    # Stat signatures of user configuration files when last loaded
+    config_signatures: ClassVar[tuple[StatSignature | None, ...] | None] = None
+
     def __init__(self, editwin: PyShellEditorWindow) -> None:
         """Initialize the settings for this extension."""
         self.editwin: PyShellEditorWindow = editwin
@@ -310,8 +508,48 @@ class idlereload:  # noqa: N801
         self.undo: UndoDelegator = editwin.undo
         self.files: IOBinding = editwin.io
 
-        self.last_mtime: float = -1.0
+        # Stat signature of file when buffer last matched it
+        self.last_signature: StatSignature | None = None
         self.direct_binds: list[tuple[str, str]] = []
+        # (filename, content digest, buffer state) of last load or save
+        self.fingerprint: Fingerprint | None = None
+        # (future, buffer state, filename) of reload computing in background
+        self.pending: (
+            tuple[Future[ReloadPlan], tuple[int, object], str] | None
+        ) = None
+        # (filename, plan, guard, start line, undo pointer) of progressive
+        # reload being applied, edits before apply_index are not done yet.
+        self.applying: tuple[str, ReloadPlan, EditGuard, int, int] | None = (
+            None
+        )
+        self.apply_index = 0
+        # Set when next finished reload should also refresh shell modules
+        self.reload_shell_after = False
+        # Phase timings of reload in progress
+        self.timer: PhaseTimer | None = None
+        # Snapshot of last save being taken in background
+        self.pending_snapshot: Future[Snapshot] | None = None
+
+        # Fingerprint whatever IDLE writes to disk
+        self.original_writefile: Callable[[str], bool] = self.files.writefile
+        setattr(self.files, "writefile", self.writefile_hook)  # noqa: B010
+        state = _FILE_STATES.get(editwin)
+        if state is not None:
+            # Extensions were reloaded, buffer holds what it did before
+            self.fingerprint, self.last_signature = state
+        elif self.files.filename is not None and self.files.get_saved():
+            # Window was just opened, but disk might not have what was
+            # loaded anymore, so there is no fingerprint until next load
+            # or save.
+            self.update_signature()
+
+        # Watcher and absolute filename it is watching for this window
+        self.watched: tuple[Watcher, str] | None = None
+        self.update_watch()
+
+        # Once every extension is loaded, remember their source files
+        self.text.after_idle(self.remember_extension_modules)
+        self.text.after_idle(self.wrap_extension_handlers)
 
         # self.direct_bind("<FocusOut>", self.focus_out_event)
         # self.direct_bind("<FocusIn>", self.focus_in_event)
@@ -329,12 +567,13 @@ class idlereload:  # noqa: N801
             if not callable(bind_func):
                 debug(f"{bind_func_name} should be callable")
                 continue
-            self.text.bind(f"<<{bind_name}>>", bind_func, "+")
+            # Unbound on close, or reloaded instances would stack up
+            self.direct_bind(f"<<{bind_name}>>", bind_func)
 
     def direct_bind(
         self,
         event_name: str,
-        callback: Callable[[Event[Misc]], None],
+        callback: Callable[[Event[Misc]], object],
     ) -> None:
         """Register a non-virtual event."""
         self.direct_binds.append(
@@ -385,14 +624,27 @@ class idlereload:  # noqa: N801
 
     @classmethod
     def reload(cls) -> None:
-        """Load class variables from configuration."""
+        """Load class variables from configuration.
+
+        Does nothing unless a user configuration file changed on disk
+        since the last call, so reloading never depends on parsing.
+        """
+        signatures = user_config_signatures()
+        if signatures == cls.config_signatures:
+            return
+
+        # IDLE just parsed everything if this is the first call
+        if cls.config_signatures is not None:
+            # Reload configuration file
+            idleConf.LoadCfgFiles()
+
         # Ensure file default values exist so they appear in settings menu
         save = cls.ensure_config_exists()
         if cls.ensure_bindings_exist() or save:
-            idleConf.SaveUserCfgFiles()
-
-        # Reload configuration file
-        idleConf.LoadCfgFiles()
+            # Only extensions configuration is ever edited here
+            idleConf.userCfg["extensions"].Save()
+            signatures = user_config_signatures()
+        cls.config_signatures = signatures
 
         # For all possible configuration values
         for key, default in cls.values.items():
@@ -417,6 +669,204 @@ class idlereload:  # noqa: N801
         )
         return confirm
 
+    def get_diff_engine(self) -> str:
+        """Return configured diff engine name, difflib if name is unknown."""
+        if self.diff_engine not in DIFF_ENGINES:
+            debug(f"Unknown diff engine {self.diff_engine!r}, using difflib")
+            return "difflib"
+        return self.diff_engine
+
+    def get_edit_granularity(self) -> str:
+        """Return configured edit granularity, line if it is unknown."""
+        if self.edit_granularity not in GRANULARITY_PATTERNS:
+            debug(
+                f"Unknown edit granularity {self.edit_granularity!r}, using line",
+            )
+            return "line"
+        return self.edit_granularity
+
+    def buffer_state(self) -> tuple[int, object]:
+        """Return undo pointer and the command it points at.
+
+        Every edit goes through the undo delegator, but typing can merge
+        into the last command without changing either, so only compare
+        against states taken with capture_state.
+        """
+        pointer: int = self.undo.pointer
+        last: object = self.undo.undolist[pointer - 1] if pointer else None
+        return pointer, last
+
+    def capture_state(self) -> tuple[int, object]:
+        """Return buffer state that the next edit is guaranteed to change."""
+        # Next edit must not merge into the current undo command,
+        # otherwise the buffer state would not change.
+        self.undo.can_merge = False
+        return self.buffer_state()
+
+    def set_fingerprint(self, filename: str, digest: bytes) -> None:
+        """Remember that buffer currently holds contents with given digest."""
+        self.fingerprint = (filename, digest, self.capture_state())
+        _FILE_STATES[self.editwin] = (self.fingerprint, self.last_signature)
+
+    def disk_changed(self, filename: str) -> bool:
+        """Return if disk contents differ from last load or save.
+
+        Cheap confirmation before prompting or diffing, so touch and
+        rewrites with identical contents do not count as changes.
+        """
+        if self.fingerprint is None or self.fingerprint[0] != filename:
+            return True
+        return hash_file(filename) != self.fingerprint[1]
+
+    def fingerprint_matches(self, filename: str) -> bool:
+        """Return if buffer is unedited and disk still has fingerprinted contents."""
+        if self.fingerprint is None:
+            return False
+        last_filename, digest, state = self.fingerprint
+        if last_filename != filename or state != self.buffer_state():
+            return False
+        return hash_file(filename) == digest
+
+    def writefile_hook(self, filename: str) -> bool:
+        """Write buffer to filename, fingerprint contents on success.
+
+        Refuse while a reload is applied progressively, the buffer is
+        half way between two versions and would overwrite the new one.
+        """
+        if self.applying is not None:
+            debug("Reload is still being applied, cancel it first", False)
+            self.text.bell()
+            return False
+        if not self.original_writefile(filename):
+            return False
+        filename = os.path.abspath(filename)
+        forget_stat(filename)
+        digest = hash_file(filename)
+        if digest is not None:
+            self.set_fingerprint(filename, digest)
+            self.take_snapshot(filename)
+        self.update_signature()
+        # Save as might have changed filename
+        self.update_watch()
+        return True
+
+    def take_snapshot(self, filename: str) -> None:
+        """Start taking snapshot of file buffer was just saved to.
+
+        Buffer holds what was written, so the file is read back and
+        compressed in a worker instead of pulling the text out of Tk.
+        Only call this right after writing the buffer, disk contents of
+        anything else are not known to match the buffer.
+        """
+        if self.pending_snapshot is not None:
+            self.pending_snapshot.cancel()
+        self.pending_snapshot = submit_snapshot(
+            filename,
+            self.files.fileencoding,
+            config_int(self.max_reload_kb, 65536) * 1024,
+        )
+        self.text.after(POLL_INTERVAL_MS, self.check_pending_snapshot)
+
+    @log_exceptions_catch
+    def check_pending_snapshot(self) -> None:
+        """Store snapshot once taken, if buffer still matches it."""
+        future = self.pending_snapshot
+        if future is None:
+            return
+        if not future.done():
+            self.text.after(POLL_INTERVAL_MS, self.check_pending_snapshot)
+            return
+        self.pending_snapshot = None
+        if future.cancelled() or future.exception() is not None:
+            # Without a snapshot, next reload reads the buffer instead
+            return
+        snapshot = future.result()
+        # File might have changed again before it was read
+        if (
+            self.fingerprint is not None
+            and self.fingerprint[1] == snapshot.digest
+        ):
+            self.store_snapshot(snapshot)
+
+    def store_snapshot(self, snapshot: Snapshot) -> None:
+        """Remember snapshot of what the buffer currently holds."""
+        limit = config_int(self.snapshot_cache_kb, 32768) * 1024
+        store_snapshot(str(self.text), snapshot, limit)
+
+    def source_lines(self) -> list[str] | Snapshot:
+        """Return buffer lines, or snapshot of them if buffer is unedited.
+
+        Snapshots are kept of the last load or save, so reloading an
+        unedited buffer never has to pull the whole document out of Tk.
+        """
+        snapshot = get_snapshot(str(self.text))
+        if (
+            snapshot is not None
+            and self.fingerprint is not None
+            and self.fingerprint[1] == snapshot.digest
+            and self.fingerprint[2] == self.buffer_state()
+        ):
+            return snapshot
+        return split_lines(self.text.get("1.0", "end-1c"))
+
+    def update_watch(self) -> None:
+        """Watch current file for changes on disk if enabled."""
+        filename: str | None = None
+        if self.watch_files == "True" and self.files.filename is not None:
+            filename = os.path.abspath(self.files.filename)
+        if self.watched is not None:
+            if self.watched[1] == filename:
+                return
+            self.unwatch()
+        if filename is None:
+            return
+        watcher = get_watcher(
+            self.editwin.root,
+            config_int(self.watch_debounce_ms, 50),
+            self.watch_backend,
+        )
+        if watcher is None:
+            debug(f"{self.watch_backend} watcher is not available", False)
+            return
+        try:
+            watcher.watch(filename, self.file_changed)
+        except OSError as exc:
+            debug(f"Could not watch {filename!r}: {exc}", False)
+            return
+        self.watched = (watcher, filename)
+
+    def unwatch(self) -> None:
+        """Stop watching current file for changes."""
+        if self.watched is None:
+            return
+        watcher, filename = self.watched
+        self.watched = None
+        watcher.unwatch(filename, self.file_changed)
+
+    @log_exceptions_catch
+    def file_changed(self, filename: str) -> None:
+        """Handle watched file changing on disk."""
+        current = self.files.filename
+        if current is None or os.path.abspath(current) != filename:
+            # File was opened or renamed without saving through IDLE
+            self.update_watch()
+            return
+        # Our own saves, and writes that leave contents as they were
+        if not self.disk_changed(filename):
+            self.update_signature()
+            return
+        if not os.path.isfile(filename):
+            return
+        # Only reload without asking if no unsaved changes would be lost
+        automatic = self.watch_action == "reload" and self.files.get_saved()
+        if automatic or askyesno(
+            "Reload",
+            "This script has been modified by another program.\nDo you want to reload from disk contents?",
+            parent=self.editwin.text,
+        ):
+            self.reload_file_contents(filename)
+        self.update_signature()
+
     def initial(self) -> tuple[str | None, str | None]:
         """Do common initial setup. Return error or none, file.
 
@@ -436,9 +886,28 @@ class idlereload:  # noqa: N801
         return None, file
 
     def reload_file_contents(self, filename: str) -> None:
-        """Reload file content from disk."""
-        # Remember where we started
-        start_line_no: int = self.editwin.getlineno()
+        """Reload file content from disk.
+
+        Reading and diffing happen in a worker unless background_diff
+        is disabled, only applying the result runs on the Tk thread.
+        """
+        if self.applying is not None:
+            debug("Reload is still being applied, cancel it first", False)
+            return
+        if self.timer is None:
+            self.timer = PhaseTimer("file", os.path.basename(filename))
+        timer = self.timer
+        # Nothing to do if disk still has what the buffer was loaded from
+        with timer.phase("fingerprint"):
+            matches = self.fingerprint_matches(filename)
+        if matches:
+            self.files.set_saved(True)
+            self.update_signature()
+            self.finish_timer(None)
+            if self.reload_shell_after:
+                # Buffer is current, but the shell might not be
+                self.reload_shell_modules(filename)
+            return
 
         # # Reload file contents
         # if self.files.loadfile(filename):
@@ -446,77 +915,335 @@ class idlereload:  # noqa: N801
         #     self.editwin.set_indentation_params(is_py_src)
         # self.editwin.gotoline(start_line_no)
 
-        # Get original and new text
-        source_text = self.text.get("1.0", "end-1c").splitlines()
-        with open(filename, encoding=self.files.fileencoding) as disk:
-            new_text = disk.read().splitlines()
+        try:
+            size = os.path.getsize(filename)
+        except OSError:
+            size = 0
+        max_size = config_int(self.max_reload_kb, 65536) * 1024
+        if max_size and size > max_size:
+            self.timer = None
+            debug(f"Not reloading {filename!r}, {size} bytes is too large")
+            messagebox.showwarning(
+                title="File Too Large",
+                message=f"File is {size // 1024} KiB, over the "
+                f"max_reload_kb limit of {max_size // 1024} KiB.",
+                parent=self.text,
+            )
+            return
+
+        # Get original text, diffed against what is on disk
+        with timer.phase("source"):
+            source_text = self.source_lines()
+        state = self.capture_state()
+
+        if self.background_diff != "True":
+            try:
+                plan = compute_reload_plan(
+                    filename,
+                    self.files.fileencoding,
+                    source_text,
+                    self.get_diff_engine(),
+                    self.get_edit_granularity(),
+                    config_int(self.diff_max_cost, 20000000),
+                    config_int(self.diff_budget_ms, 1000) / 1000,
+                    max_size,
+                )
+            except (OSError, UnicodeError) as exc:
+                self.reload_failed(filename, exc)
+                return
+            self.apply_reload_plan(filename, plan)
+            return
+
+        if self.pending is not None:
+            # Result of the reload already running will be stale
+            self.pending[0].cancel()
+        threshold = config_int(self.process_threshold_kb, 8192) * 1024
+        use_process = size > threshold
+        future = submit_reload_plan(
+            filename,
+            self.files.fileencoding,
+            source_text,
+            self.get_diff_engine(),
+            self.get_edit_granularity(),
+            config_int(self.diff_max_cost, 20000000),
+            config_int(self.diff_budget_ms, 1000) / 1000,
+            max_size,
+            use_process,
+        )
+        self.pending = (future, state, filename)
+        self.text.after(POLL_INTERVAL_MS, self.check_pending_reload)
+
+    @log_exceptions_catch
+    def check_pending_reload(self) -> None:
+        """Apply background reload once done, recompute if it is stale."""
+        if self.pending is None:
+            return
+        future, state, filename = self.pending
+        if not future.done():
+            self.text.after(POLL_INTERVAL_MS, self.check_pending_reload)
+            return
+        self.pending = None
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self.reload_failed(filename, error)
+            return
+        plan = future.result()
+        if state != self.buffer_state():
+            debug("Buffer changed while diffing, reloading again", False)
+            self.reload_file_contents(filename)
+            return
+        self.apply_reload_plan(filename, plan)
+
+    def reload_failed(self, filename: str, error: BaseException) -> None:
+        """Show why reading or diffing file failed, forget the reload."""
+        self.timer = None
+        self.reload_shell_after = False
+        debug(f"Could not reload {filename!r}: {error}")
+        messagebox.showerror(
+            title="Reload Failed",
+            message=f"Could not reload {os.path.basename(filename)}:\n\n"
+            f"{error}",
+            parent=self.text,
+        )
+
+    def apply_reload_plan(self, filename: str, plan: ReloadPlan) -> None:
+        """Edit buffer into new file contents from reload plan."""
+        if self.timer is not None:
+            for phase, seconds in plan.timings.items():
+                self.timer.add(phase, seconds)
+        # Remember where we started
+        start_line_no: int = self.editwin.getlineno()
 
-        # debug('\nNew segment start:')
-        matcher = difflib.SequenceMatcher(None, source_text, new_text)
+        threshold = config_int(self.progressive_threshold_lines, 5000)
+        if changed_lines(plan.opcodes) >= threshold:
+            self.start_progressive_apply(filename, plan, start_line_no)
+            return
 
         # Edit current text into new version
-        with undo_block(self.undo):
-            line_offset = 1
-            start_offset = 0
-            # For each delta operation
-            for tag, a_low, a_high, b_low, b_high in matcher.get_opcodes():
-                # debug(f"{tag:8} a[{a_low}:{a_high}] b[{b_low}:{b_high}]")
-                source_data = "\n".join(source_text[a_low:a_high]) + "\n"
-                final_data = "\n".join(new_text[b_low:b_high]) + "\n"
-                # debug(f"> {source_data!r} {final_data!r}")
-
-                if tag == "replace":
-                    self.text.delete(
-                        f"{a_low + line_offset}.0",
-                        f"{a_high + line_offset}.0",
-                    )
-                    self.text.insert(
-                        f"{a_low + line_offset}.0",
-                        final_data,
-                        (),
-                    )
-                    line_offset += (b_high - b_low) - (a_high - a_low)
-                    if a_low < start_line_no:
-                        start_offset += (b_high - b_low) - (a_high - a_low)
-                elif tag == "delete":
-                    get = self.text.get(
-                        f"{a_low + line_offset}.0",
-                        f"{a_high + line_offset}.0",
-                    )
-                    assert get == source_data, f"{get!r} != {source_data!r}"
-                    self.text.delete(
-                        f"{a_low + line_offset}.0",
-                        f"{a_high + line_offset}.0",
-                    )
-                    line_offset -= a_high - a_low
-                    if a_low < start_line_no:
-                        start_offset -= a_high - a_low
-                elif tag == "insert":
-                    self.text.insert(
-                        f"{a_low + line_offset}.0",
-                        final_data,
-                        (),
-                    )
-                    line_offset += b_high - b_low
-                    if a_low < start_line_no:
-                        start_offset += b_high - b_low
-                elif tag == "equal":
-                    get = self.text.get(
-                        f"{a_low + line_offset}.0",
-                        f"{a_high + line_offset}.0",
-                    )
-                    assert get == source_data, f"{get!r} != {source_data!r}"
-                    continue
-                else:
-                    raise ValueError(f"Unknown tag {tag!r}")
-            self.files.set_saved(True)
-        self.update_mtime()
-        self.editwin.gotoline(start_line_no + start_offset)
+        start = time.perf_counter()
+        self.apply_plan_edits(plan.edits)
+        self.record_reload(plan)
+        if self.timer is not None:
+            self.timer.add("apply", time.perf_counter() - start)
+        self.finish_reload(filename, plan, start_line_no)
+
+    def apply_plan_edits(self, edits: Sequence[Edit]) -> None:
+        """Apply edits straight to the widget, below every filter.
+
+        The undo delegator would keep every edit, record_reload adds
+        one compact entry instead. Filters like the colorizer would
+        schedule work for every single edit, recolorize catches them up.
+        """
+        apply_edits(cast("Text", self.editwin.per.bottom), edits)
+
+    def record_reload(self, plan: ReloadPlan) -> None:
+        """Add compact undo entry of applied reload, trim reload history."""
+        self.undo.addcmd(plan.record, execute=False)
+        limit = config_int(self.undo_reload_kb, 8192) * 1024
+        dropped = trim_undo(self.undo, limit)
+        if self.timer is not None:
+            self.timer.counts["undo_dropped"] = dropped
+
+    def recolorize(self, opcodes: Sequence[Opcode]) -> int:
+        """Have the colorizer redo changed lines of reload, all at once.
+
+        Return number of lines handed to the colorizer.
+        """
+        color = self.editwin.color
+        if color is None:
+            return 0
+        ranges = changed_ranges(opcodes)
+        for start, end in ranges:
+            color.notify_range(f"{start + 1}.0", f"{end + 1}.0")
+        return sum(end - start for start, end in ranges)
+
+    def finish_reload(
+        self,
+        filename: str,
+        plan: ReloadPlan,
+        start_line_no: int,
+    ) -> None:
+        """Finish up after every edit of a reload plan was applied."""
+        start = time.perf_counter()
+        # Only after undo block is stopped, it moves the undo pointer
+        self.files.set_saved(True)
+        recolor_start = time.perf_counter()
+        recolored = self.recolorize(plan.opcodes)
+        recolor_time = time.perf_counter() - recolor_start
+        if self.verify_edits == "True":
+            verify_text(self.text, plan.new_lines)
+        self.set_fingerprint(filename, plan.digest)
+        self.store_snapshot(plan.snapshot)
+        self.update_signature()
+        finish_time = time.perf_counter() - start - recolor_time
+        start = time.perf_counter()
+        self.editwin.gotoline(map_line(plan.opcodes, start_line_no))
+        if self.timer is not None:
+            # Apply phase never includes colorizing, this is all of it
+            self.timer.add("recolor", recolor_time)
+            self.timer.counts["lines_recolored"] = recolored
+            self.timer.add("finish", finish_time)
+            self.timer.add("gotoline", time.perf_counter() - start)
+        self.finish_timer(plan)
+        if self.reload_shell_after or self.reload_shell == "True":
+            self.reload_shell_modules(filename)
+
+    def finish_timer(self, plan: ReloadPlan | None) -> None:
+        """Store statistics of reload that just finished."""
+        timer = self.timer
+        if timer is None:
+            return
+        self.timer = None
+        if plan is not None:
+            timer.strategy = plan.strategy
+            timer.counts.update(
+                bytes_read=plan.size,
+                opcodes=sum(opcode[0] != "equal" for opcode in plan.opcodes),
+                lines_changed=changed_lines(plan.opcodes),
+                edits=len(plan.edits),
+            )
+        timer.finish(config_int(self.stats_history, 500))
+
+    def reload_shell_modules(self, filename: str) -> None:
+        """Reload modules of filename and their dependents in the shell."""
+        self.reload_shell_after = False
+        pyshell = self.editwin.flist.pyshell
+        if pyshell is None:
+            debug("No shell is open to reload modules in", False)
+            return
+        if not reload_in_subprocess(pyshell.interp, filename):
+            debug("Shell subprocess is not available", False)
+
+    def set_status(self, message: str) -> None:
+        """Show message in the status bar of the editor window."""
+        self.editwin.status_bar.set_label(__title__, message, side=RIGHT)
+
+    def start_progressive_apply(
+        self,
+        filename: str,
+        plan: ReloadPlan,
+        start_line_no: int,
+    ) -> None:
+        """Start applying reload plan a slice at a time through after."""
+        guard = EditGuard()
+        self.editwin.per.insertfilter(guard)
+        self.undo.undo_block_start()
+        self.block_undo(True)
+        self.applying = (
+            filename,
+            plan,
+            guard,
+            start_line_no,
+            self.undo.pointer,
+        )
+        self.apply_index = len(plan.edits)
+        self.set_status("Reloading 0%")
+        self.text.after_idle(self.apply_reload_slice)
+
+    def stop_progressive_apply(self) -> None:
+        """Close undo block and stop guarding the buffer."""
+        if self.applying is None:
+            return
+        guard = self.applying[2]
+        self.applying = None
+        self.block_undo(False)
+        self.editwin.per.removefilter(guard)
+        self.undo.undo_block_stop()
+        self.set_status("")
+
+    def cancel_progressive_apply(self) -> None:
+        """Undo edits of progressive reload applied so far and stop it."""
+        if self.applying is None:
+            return
+        block: object = self.undo.undoblock
+        if isinstance(block, CommandSequence):
+            block.undo(cast("Text", self.undo.delegate))
+            # Nothing left to record once the block is stopped
+            block.cmds.clear()
+        self.stop_progressive_apply()
+
+    def block_undo(self, block: bool) -> None:
+        """Make undo and redo ring the bell instead if block, else restore.
+
+        Undo history must not move while the undo block of a progressive
+        reload is open, or its edits would land on the wrong text.
+        """
+        for event, handler in (
+            ("<<undo>>", self.undo.undo_event),
+            ("<<redo>>", self.undo.redo_event),
+        ):
+            self.text.bind(event, self.blocked_event if block else handler)
+
+    def blocked_event(self, event: Event[Misc]) -> str:
+        """Ring the bell, event is not allowed while a reload is applied."""
+        self.text.bell()
+        return "break"
+
+    @log_exceptions_catch
+    def apply_reload_slice(self) -> None:
+        """Apply edits of progressive reload until slice time runs out."""
+        if self.applying is None:
+            return
+        filename, plan, guard, start_line_no, pointer = self.applying
+        if self.undo.pointer != pointer:
+            # Undo or redo moved text under the remaining edits
+            debug("Buffer changed while applying, reloading again", False)
+            self.stop_progressive_apply()
+            self.reload_file_contents(filename)
+            return
+
+        start = time.perf_counter()
+        deadline = start + config_int(self.slice_ms, 15) / 1000
+        guard.allow = True
+        try:
+            with bypass_filters(self.undo, self.editwin.per.bottom):
+                while self.apply_index and time.perf_counter() < deadline:
+                    self.apply_index -= 1
+                    index = self.apply_index
+                    apply_edits(self.text, plan.edits[index : index + 1])
+        finally:
+            guard.allow = False
+        if self.timer is not None:
+            self.timer.add("apply", time.perf_counter() - start)
+
+        if self.apply_index:
+            done = len(plan.edits) - self.apply_index
+            self.set_status(f"Reloading {done * 100 // len(plan.edits)}%")
+            # Let Tk redraw and handle events before the next slice
+            self.text.after(1, self.apply_reload_slice)
+            return
+        block: object = self.undo.undoblock
+        if isinstance(block, CommandSequence):
+            # Edits are recorded so cancel can undo them, now replace
+            # them with one compact entry.
+            block.cmds.clear()
+        self.stop_progressive_apply()
+        self.record_reload(plan)
+        self.finish_reload(filename, plan, start_line_no)
+
+    @log_exceptions_catch
+    def idlereload_cancel_reload_event(self, event: Event[Misc]) -> str:
+        """Cancel reload being computed or applied, undoing applied edits."""
+        self.reload_shell_after = False
+        self.timer = None
+        if self.pending is not None:
+            self.pending[0].cancel()
+            self.pending = None
+        if self.applying is not None:
+            self.cancel_progressive_apply()
+            self.set_status("Reload cancelled")
+            self.text.after(2000, self.set_status, "")
+        self.text.bell()
+        return "break"
 
     @log_exceptions_catch
     def reload_file_event(self, event: Event[Misc]) -> str:
         """Reload currently open file."""
+        start = time.perf_counter()
         init_return, filename = self.initial()
+        config_time = time.perf_counter() - start
 
         if init_return is not None:
             return init_return
@@ -524,6 +1251,10 @@ class idlereload:  # noqa: N801
             debug("Filename is None", False)
             self.text.bell()
             return "break"
+        if self.applying is not None:
+            debug("Reload is still being applied, cancel it first", False)
+            self.text.bell()
+            return "break"
         if not self.files.get_saved():
             if self.ask_save_dialog():
                 # clear to save
@@ -540,11 +1271,26 @@ class idlereload:  # noqa: N801
 
         self.files.set_saved(False)
 
+        self.timer = PhaseTimer("file", os.path.basename(filename))
+        self.timer.add("config", config_time)
         self.reload_file_contents(filename)
 
         self.text.bell()
         return "break"
 
+    @log_exceptions_catch
+    def idlereload_reload_shell_event(self, event: Event[Misc]) -> str:
+        """Reload currently open file, then its modules in the shell."""
+        if self.files.filename is None:
+            self.text.bell()
+            return "break"
+        self.reload_shell_after = True
+        self.reload_file_event(event)
+        if self.pending is None and self.applying is None:
+            # Reload was refused or failed before anything started
+            self.reload_shell_after = False
+        return "break"
+
     # def undo_fill_menu(self, menudefs, keydefs) -> None:
     #     for mname, entrylist in menudefs:
     #         if not entrylist:
@@ -573,74 +1319,197 @@ class idlereload:  # noqa: N801
     #         menu.delete(None)
     #     self.editwin.fill_menus()
 
+    def remember_extension_modules(self) -> None:
+        """Record source state of loaded extension modules."""
+        remember_modules(extension_modules(self.editwin))
+
+    def wrap_extension_handlers(self) -> None:
+        """Time event handlers of every extension of window if enabled."""
+        if self.time_handlers != "True":
+            return
+        threshold = config_int(self.slow_handler_ms, 100) / 1000
+        count = time_extension_handlers(
+            self.editwin,
+            threshold,
+            report_slow_handler,
+        )
+        debug(f"Timing {count} extension event handlers", False)
+
+    @log_exceptions_catch
+    def idlereload_handler_report_event(self, event: Event[Misc]) -> str:
+        """Show slowest event handlers of every extension."""
+        view_text(
+            # Stubs expect a ttk widget, any widget works
+            self.text,  # type: ignore[arg-type]
+            "Slow Event Handlers",
+            handler_report(self.handler_sort),
+            modal=False,
+            wrap="none",
+        )
+        return "break"
+
     def unload_extensions(self) -> None:
         """Unload extensions."""
-        for extension_name, extension in self.editwin.extensions.items():
-            ext_keydefs = idleConf.GetExtensionBindings(extension_name)
-            # undo fill_menus(cls.menudefs, keydefs)
-            # if hasattr(extension, "menudefs"):
-            #     self.undo_fill_menu(extension.menudefs, ext_keydefs)
-            for event, keylist in ext_keydefs.items():
-                try:
-                    self.editwin.text.event_delete(event, *keylist)
-                except ValueError as exc:
-                    traceback.print_exception(exc)
-                try:
-                    self.editwin.text.event_delete(event)
-                except ValueError as exc:
-                    traceback.print_exception(exc)
+        roots = teardown_extensions(self.editwin)
+        reloaded = reload_changed(roots)
+        debug(f"Reloaded modules {reloaded}", False)
 
-            try:
-                if hasattr(extension, "close"):
-                    extension.close()
-            except Exception as exc:
-                traceback.print_exception(exc)
-                extension_log_exception(exc)
+    @log_exceptions_catch
+    def idlereload_reload_extensions_event(self, event: Event[Misc]) -> str:
+        """Reload extensions."""
+        print(f"[{__title__}]: Reloading extensions")
+        timer = PhaseTimer(
+            "extensions",
+            self.editwin.short_title() or "Untitled",
+        )
+        with timer.phase("compile"):
+            roots = extension_modules(self.editwin)
+            if not self.precompile_extensions(roots):
+                return "break"
+        with timer.phase("unload"):
+            old_ui = extension_ui(self.editwin)
+            self.unload_extensions()
+        with timer.phase("load"):
+            load_extensions(self.editwin, old_ui)
+        timer.counts.update(windows=1, extensions=len(roots))
+        timer.finish(config_int(self.stats_history, 500))
 
-            try:
-                if hasattr(extension, "on_reloading"):
-                    extension.on_reloading()
-            except Exception as exc:
-                traceback.print_exception(exc)
-                extension_log_exception(exc)
+        self.text.bell()
+        return "break"
 
-            if extension_name in sys.modules:
-                to_remove: list[ModuleType] = [sys.modules[extension_name]]
+    def precompile_extensions(self, roots: Collection[str]) -> bool:
+        """Compile changed extension sources before anything is torn down.
 
-                submodule = f"{extension_name}."
-                for name, module in sys.modules.items():
-                    if name.startswith(submodule):
-                        to_remove.append(module)
-                for module in to_remove:
-                    importlib.reload(module)
+        Return False after showing errors if any source does not compile,
+        so a broken edit never leaves windows without extensions.
+        """
+        errors = precompile(changed_sources(roots))
+        if not errors:
+            return True
+        for error in errors.values():
+            debug(error)
+        messagebox.showerror(
+            title="Extension Source Errors",
+            message="Not reloading extensions, fix these errors first:\n\n"
+            + "\n\n".join(errors.values()),
+            parent=self.text,
+        )
+        return False
 
-        self.editwin.extensions.clear()
+    def editor_windows(self) -> list[EditorWindow]:
+        """Return every open editor and shell window."""
+        windows: list[EditorWindow] = list(
+            self.editwin.flist.inversedict,
+        )
+        if self.editwin not in windows:
+            windows.append(self.editwin)
+        return windows
 
     @log_exceptions_catch
-    def idlereload_reload_extensions_event(self, event: Event[Misc]) -> str:
-        """Reload extensions."""
-        print(f"[{__title__}]: Reloading extensions")
-        self.unload_extensions()
+    def idlereload_reload_extensions_everywhere_event(
+        self,
+        event: Event[Misc],
+    ) -> str:
+        """Reload extension modules once, then extensions of every window."""
+        print(f"[{__title__}]: Reloading extensions everywhere")
+        timer = PhaseTimer("extensions", "Everywhere")
+        history = config_int(self.stats_history, 500)
+        editwin = self.editwin
+        windows = self.editor_windows()
+        timings: dict[EditorWindow, float] = {}
+
+        start = time.perf_counter()
+        roots: set[str] = set()
+        for window in windows:
+            roots.update(extension_modules(window))
+        if not self.precompile_extensions(roots):
+            return "break"
+        compile_time = time.perf_counter() - start
+
+        old_ui: dict[EditorWindow, dict[str, ExtensionUI]] = {}
+        for window in windows:
+            start = time.perf_counter()
+            old_ui[window] = extension_ui(window)
+            teardown_extensions(window)
+            timings[window] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        reloaded = reload_changed(roots)
+        reload_time = time.perf_counter() - start
+
+        for window in windows:
+            start = time.perf_counter()
+            load_extensions(window, old_ui[window])
+            timings[window] += time.perf_counter() - start
+
+        lines = [
+            f"Compiled changed sources in {compile_time * 1000:.1f} ms",
+            f"Reloaded {len(reloaded)} modules in {reload_time * 1000:.1f} ms",
+        ]
+        lines.extend(
+            f"{window.short_title() or 'Untitled'}: {taken * 1000:.1f} ms"
+            for window, taken in timings.items()
+        )
+        debug("\n".join(lines))
+        timer.add("compile", compile_time)
+        timer.add("reload", reload_time)
+        timer.add("windows", sum(timings.values()))
+        timer.counts.update(windows=len(windows), modules=len(reloaded))
+        timer.finish(history)
+        # This instance was closed, but its window is still there
+        editwin.status_bar.set_label(
+            __title__,
+            f"Reloaded {len(windows)} windows in "
+            f"{(reload_time + sum(timings.values())) * 1000:.0f} ms",
+            side=RIGHT,
+        )
+        editwin.text.after(5000, editwin.status_bar.set_label, __title__, "")
 
-        def noop(*args: Any, **kwargs: Any) -> None:
-            """Do nothing."""
+        editwin.text.bell()
+        return "break"
 
-        with temporary_overwrite(self.editwin, "fill_menus", noop):
-            self.editwin.load_extensions()
+    @log_exceptions_catch
+    def idlereload_reload_statistics_event(self, event: Event[Misc]) -> str:
+        """Show percentiles of recent reload timings and counts."""
+        view_text(
+            # Stubs expect a ttk widget, any widget works
+            self.text,  # type: ignore[arg-type]
+            "Reload Statistics",
+            summarize(get_records()),
+            modal=False,
+            wrap="none",
+        )
+        return "break"
 
-        self.text.bell()
+    @log_exceptions_catch
+    def idlereload_export_statistics_event(self, event: Event[Misc]) -> str:
+        """Save every recorded reload to a JSON lines file."""
+        filename = filedialog.asksaveasfilename(
+            parent=self.text,
+            title="Export Reload Statistics",
+            initialdir=LOG_PATH.parent,
+            initialfile=f"{__title__}-stats.jsonl",
+            defaultextension=".jsonl",
+            filetypes=[("JSON lines", "*.jsonl"), ("All files", "*")],
+        )
+        if not filename:
+            return "break"
+        count = export_json_lines(Path(filename), get_records())
+        debug(f"Exported {count} reload records to {filename!r}", False)
         return "break"
 
-    def update_mtime(self) -> float | None:
-        """Update and return last_mtime."""
+    def update_signature(self) -> StatSignature | None:
+        """Update and return last_signature."""
         filename = self.editwin.io.filename
         if filename is None:
             return None
-        mtime = get_mtime(filename)
-        if mtime is None:
+        # Shared with every window and the stat scheduler
+        signature = get_signature(os.path.abspath(filename))
+        if signature is None:
             return None
-        self.last_mtime = mtime
-        return self.last_mtime
+        self.last_signature = signature
+        _FILE_STATES[self.editwin] = (self.fingerprint, signature)
+        return self.last_signature
 
     @log_exceptions_catch
     def focus_out_event(self, event: Event[Misc]) -> None:
@@ -650,7 +1519,7 @@ class idlereload:  # noqa: N801
             return
 
         if self.files.get_saved():
-            self.update_mtime()
+            self.update_signature()
 
     @log_exceptions_catch
     def focus_in_event(self, event: Event[Misc]) -> None:
@@ -658,28 +1527,44 @@ class idlereload:  # noqa: N801
         filename = self.editwin.io.filename
         if filename is None:
             return
-        # mtime is still set from startup
-        if self.last_mtime == -1.0:
-            self.update_mtime()
+        # Signature is still unset from startup
+        if self.last_signature is None:
+            self.update_signature()
             return
-        current_mtime = get_mtime(filename)
-        if current_mtime is None:
+        filename = os.path.abspath(filename)
+        current = get_signature(filename)
+        if current is None:
             return
-        if current_mtime != self.last_mtime:
-            print(f"{current_mtime   = }\n{self.last_mtime = }")
-            if askyesno(
+        # Hashing is much cheaper than a spurious prompt and reload
+        changed = signature_changed(self.last_signature, current)
+        if (
+            changed
+            and self.disk_changed(filename)
+            and askyesno(
                 "Reload",
                 "This script has been modified by another program.\nDo you want to reload from disk contents?",
                 parent=self.editwin.text,
-            ):
-                self.reload_file_contents(filename)
-        # Always update time or will loop forever
-        self.update_mtime()
+            )
+        ):
+            self.reload_file_contents(filename)
+        # Always update signature or will loop forever
+        self.update_signature()
 
     @log_exceptions_catch
     def close(self) -> None:
         """Handle window closing."""
         self.unregister_direct_binds()
+        self.unwatch()
+        forget_snapshot(str(self.text))
+        if self.pending_snapshot is not None:
+            self.pending_snapshot.cancel()
+            self.pending_snapshot = None
+        setattr(self.files, "writefile", self.original_writefile)  # noqa: B010
+        if self.pending is not None:
+            self.pending[0].cancel()
+            self.pending = None
+        # Extensions are also closed when reloaded, leave text as it was
+        self.cancel_progressive_apply()
 
 
 idlereload.reload()
@@ -0,0 +1,495 @@
+"""Diff Engines - Line diff algorithms producing difflib style opcodes."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# IdleReload - Reload File Contents IDLE Extension.
+# Copyright (C) 2023-2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "Diff Engines"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+import difflib
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Final, TypeAlias
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable, Sequence
+
+# (tag, a_low, a_high, b_low, b_high), same as SequenceMatcher.get_opcodes
+Opcode: TypeAlias = "tuple[str, int, int, int, int]"
+# (a_index, b_index, size), same as SequenceMatcher.get_matching_blocks
+Match: TypeAlias = "tuple[int, int, int]"
+DiffEngine: TypeAlias = (
+    "Callable[[Sequence[Hashable], Sequence[Hashable]], list[Opcode]]"
+)
+
+# perf_counter time engines of this thread have to stop at
+_DEADLINE: ContextVar[float | None] = ContextVar("_DEADLINE", default=None)
+
+
+class DiffTimeoutError(Exception):
+    """Raised inside a diff engine once its time budget ran out."""
+
+
+def check_deadline() -> None:
+    """Raise DiffTimeoutError if the diff running in this thread is overdue."""
+    deadline = _DEADLINE.get()
+    if deadline is not None and time.perf_counter() > deadline:
+        raise DiffTimeoutError
+
+
+def opcodes_from_matches(
+    matches: Sequence[Match],
+    a_length: int,
+    b_length: int,
+) -> list[Opcode]:
+    """Return opcodes describing how to turn a into b from matching blocks.
+
+    Matches must be sorted and non-overlapping. Mirrors
+    SequenceMatcher.get_opcodes so every engine emits identical tags.
+    """
+    opcodes: list[Opcode] = []
+    a_index = b_index = 0
+    for a_match, b_match, size in (*matches, (a_length, b_length, 0)):
+        tag = ""
+        if a_index < a_match and b_index < b_match:
+            tag = "replace"
+        elif a_index < a_match:
+            tag = "delete"
+        elif b_index < b_match:
+            tag = "insert"
+        if tag:
+            opcodes.append((tag, a_index, a_match, b_index, b_match))
+        a_index = a_match + size
+        b_index = b_match + size
+        if size:
+            opcodes.append(("equal", a_match, a_index, b_match, b_index))
+    return opcodes
+
+
+def merge_matches(matches: Sequence[Match]) -> list[Match]:
+    """Return sorted matches with adjacent runs joined together."""
+    merged: list[Match] = []
+    for a_index, b_index, size in sorted(matches):
+        if not size:
+            continue
+        if merged:
+            last_a, last_b, last_size = merged[-1]
+            if last_a + last_size == a_index and last_b + last_size == b_index:
+                merged[-1] = (last_a, last_b, last_size + size)
+                continue
+        merged.append((a_index, b_index, size))
+    return merged
+
+
+def _trim_common(
+    a: Sequence[Hashable],
+    b: Sequence[Hashable],
+    a_low: int,
+    a_high: int,
+    b_low: int,
+    b_high: int,
+) -> tuple[int, int]:
+    """Return length of common prefix and common suffix of the ranges."""
+    prefix = 0
+    limit = min(a_high - a_low, b_high - b_low)
+    while prefix < limit and a[a_low + prefix] == b[b_low + prefix]:
+        prefix += 1
+    suffix = 0
+    limit -= prefix
+    while suffix < limit and a[a_high - suffix - 1] == b[b_high - suffix - 1]:
+        suffix += 1
+    return prefix, suffix
+
+
+def _middle_snake(
+    a: Sequence[Hashable],
+    b: Sequence[Hashable],
+    left: int,
+    top: int,
+    right: int,
+    bottom: int,
+) -> tuple[int, int, int, int]:
+    """Return start and end points of the middle snake of an edit graph box.
+
+    Searches forwards from the top left corner and backwards from the
+    bottom right corner at the same time until the paths overlap.
+    Box must not be empty.
+    """
+    width = right - left
+    height = bottom - top
+    delta = width - height
+    odd = delta & 1
+    max_d = (width + height + 1) // 2
+    # Index with negative numbers, Python wraps them to the end.
+    forward = [0] * (2 * max_d + 2)
+    backward = [0] * (2 * max_d + 2)
+    forward[1] = left
+    backward[1] = bottom
+
+    for d in range(max_d + 1):
+        check_deadline()
+        for k in range(d, -d - 1, -2):
+            c = k - delta
+            if k == -d or (k != d and forward[k - 1] < forward[k + 1]):
+                x = px = forward[k + 1]
+            else:
+                px = forward[k - 1]
+                x = px + 1
+            y = top + (x - left) - k
+            py = y if (d == 0 or x != px) else y - 1
+            while x < right and y < bottom and a[x] == b[y]:
+                x += 1
+                y += 1
+            forward[k] = x
+            if odd and -(d - 1) <= c <= d - 1 and y >= backward[c]:
+                return px, py, x, y
+
+        for c in range(d, -d - 1, -2):
+            k = c + delta
+            if c == -d or (c != d and backward[c - 1] > backward[c + 1]):
+                y = py = backward[c + 1]
+            else:
+                py = backward[c - 1]
+                y = py - 1
+            x = left + (y - top) + k
+            px = x if (d == 0 or y != py) else x + 1
+            while x > left and y > top and a[x - 1] == b[y - 1]:
+                x -= 1
+                y -= 1
+            backward[c] = y
+            if not odd and -d <= k <= d and x <= forward[k]:
+                return x, y, px, py
+    raise AssertionError("Middle snake not found")
+
+
+def _myers_core(
+    a: Sequence[Hashable],
+    b: Sequence[Hashable],
+    a_low: int,
+    a_high: int,
+    b_low: int,
+    b_high: int,
+) -> list[Match]:
+    """Return matching blocks of the given ranges using linear space Myers."""
+    matches: list[Match] = []
+    stack = [(a_low, b_low, a_high, b_high)]
+    while stack:
+        check_deadline()
+        left, top, right, bottom = stack.pop()
+        prefix, suffix = _trim_common(a, b, left, right, top, bottom)
+        if prefix:
+            matches.append((left, top, prefix))
+            left += prefix
+            top += prefix
+        if suffix:
+            right -= suffix
+            bottom -= suffix
+            matches.append((right, bottom, suffix))
+        if left == right or top == bottom:
+            continue
+        start_x, start_y, end_x, end_y = _middle_snake(
+            a,
+            b,
+            left,
+            top,
+            right,
+            bottom,
+        )
+        # The snake is at most one step plus a diagonal run, so once its
+        # box has the common prefix and suffix trimmed nothing is left.
+        stack.append((left, top, start_x, start_y))
+        stack.append((start_x, start_y, end_x, end_y))
+        stack.append((end_x, end_y, right, bottom))
+    return merge_matches(matches)
+
+
+def _myers_matches(
+    a: Sequence[Hashable],
+    b: Sequence[Hashable],
+    a_low: int,
+    a_high: int,
+    b_low: int,
+    b_high: int,
+) -> list[Match]:
+    """Return matching blocks of the given ranges.
+
+    Items that do not appear on the other side can never match, so they
+    are discarded before running Myers (like GNU diff does). This keeps
+    full rewrites of generated files from hitting the O(ND) worst case.
+    """
+    b_items = {b[index] for index in range(b_low, b_high)}
+    a_keep = [index for index in range(a_low, a_high) if a[index] in b_items]
+    a_items = {a[index] for index in a_keep}
+    b_keep = [index for index in range(b_low, b_high) if b[index] in a_items]
+    if len(a_keep) == a_high - a_low and len(b_keep) == b_high - b_low:
+        return _myers_core(a, b, a_low, a_high, b_low, b_high)
+    reduced_a = [a[index] for index in a_keep]
+    reduced_b = [b[index] for index in b_keep]
+    matches = _myers_core(
+        reduced_a,
+        reduced_b,
+        0,
+        len(reduced_a),
+        0,
+        len(reduced_b),
+    )
+    return merge_matches(
+        [
+            (a_keep[a_index + offset], b_keep[b_index + offset], 1)
+            for a_index, b_index, size in matches
+            for offset in range(size)
+        ],
+    )
+
+
+class _CheckedMatcher(difflib.SequenceMatcher):  # type: ignore[type-arg]
+    """SequenceMatcher that checks the deadline before every block search."""
+
+    def find_longest_match(
+        self,
+        alo: int = 0,
+        ahi: int | None = None,
+        blo: int = 0,
+        bhi: int | None = None,
+    ) -> difflib.Match:
+        """Return longest matching block in the ranges."""
+        check_deadline()
+        return super().find_longest_match(alo, ahi, blo, bhi)
+
+
+def difflib_opcodes(
+    a: Sequence[Hashable],
+    b: Sequence[Hashable],
+) -> list[Opcode]:
+    """Return opcodes from difflib.SequenceMatcher, the reference engine."""
+    matcher = _CheckedMatcher(None, a, b)
+    return [
+        (tag, a_low, a_high, b_low, b_high)
+        for tag, a_low, a_high, b_low, b_high in matcher.get_opcodes()
+    ]
+
+
+def myers_opcodes(
+    a: Sequence[Hashable],
+    b: Sequence[Hashable],
+) -> list[Opcode]:
+    """Return opcodes from a Myers O(ND) shortest edit script."""
+    return opcodes_from_matches(
+        _myers_matches(a, b, 0, len(a), 0, len(b)),
+        len(a),
+        len(b),
+    )
+
+
+def _unique_common(
+    a: Sequence[Hashable],
+    b: Sequence[Hashable],
+    a_low: int,
+    a_high: int,
+    b_low: int,
+    b_high: int,
+) -> list[tuple[int, int]]:
+    """Return (a_index, b_index) of items unique in both ranges, a order."""
+    a_seen: dict[Hashable, int] = {}
+    for index in range(a_low, a_high):
+        item = a[index]
+        a_seen[item] = -1 if item in a_seen else index
+    b_seen: dict[Hashable, int] = {}
+    for index in range(b_low, b_high):
+        item = b[index]
+        if item in a_seen:
+            b_seen[item] = -1 if item in b_seen else index
+    return [
+        (a_seen[item], b_index)
+        for item, b_index in b_seen.items()
+        if b_index != -1 and a_seen[item] != -1
+    ]
+
+
+def _longest_increasing(pairs: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Return longest run of pairs increasing in both items (patience sort).
+
+    Pairs must already be sorted by first item.
+    """
+    tails: list[int] = []
+    tail_pairs: list[int] = []
+    previous: list[int] = []
+    for index, (_a_index, b_index) in enumerate(pairs):
+        pile = bisect_left(tails, b_index)
+        if pile == len(tails):
+            tails.append(b_index)
+            tail_pairs.append(index)
+        else:
+            tails[pile] = b_index
+            tail_pairs[pile] = index
+        previous.append(tail_pairs[pile - 1] if pile else -1)
+    result: list[tuple[int, int]] = []
+    index = tail_pairs[-1] if tail_pairs else -1
+    while index != -1:
+        result.append(pairs[index])
+        index = previous[index]
+    result.reverse()
+    return result
+
+
+def patience_opcodes(
+    a: Sequence[Hashable],
+    b: Sequence[Hashable],
+) -> list[Opcode]:
+    """Return opcodes from patience diff.
+
+    Lines that appear exactly once on both sides anchor the diff, which
+    keeps moved functions and blank line churn readable. Ranges without
+    unique anchors are handed to the Myers engine.
+    """
+    matches: list[Match] = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        check_deadline()
+        a_low, a_high, b_low, b_high = stack.pop()
+        prefix, suffix = _trim_common(a, b, a_low, a_high, b_low, b_high)
+        if prefix:
+            matches.append((a_low, b_low, prefix))
+            a_low += prefix
+            b_low += prefix
+        if suffix:
+            a_high -= suffix
+            b_high -= suffix
+            matches.append((a_high, b_high, suffix))
+        if a_low == a_high or b_low == b_high:
+            continue
+        pairs = _unique_common(a, b, a_low, a_high, b_low, b_high)
+        pairs.sort()
+        anchors = _longest_increasing(pairs)
+        if not anchors:
+            matches.extend(_myers_matches(a, b, a_low, a_high, b_low, b_high))
+            continue
+        for a_index, b_index in anchors:
+            matches.append((a_index, b_index, 1))
+            stack.append((a_low, a_index, b_low, b_index))
+            a_low = a_index + 1
+            b_low = b_index + 1
+        stack.append((a_low, a_high, b_low, b_high))
+    return opcodes_from_matches(merge_matches(matches), len(a), len(b))
+
+
+DIFF_ENGINES: Final[dict[str, DiffEngine]] = {
+    "difflib": difflib_opcodes,
+    "myers": myers_opcodes,
+    "patience": patience_opcodes,
+}
+
+
+def reordered_items(
+    a: Sequence[Hashable],
+    b: Sequence[Hashable],
+    a_low: int = 0,
+    a_high: int | None = None,
+    b_low: int = 0,
+    b_high: int | None = None,
+) -> int:
+    """Return number of items unique on both sides that changed order.
+
+    Patience diff anchors on these, engines that only keep common items
+    in order, like Myers, have to delete and insert every one of them.
+    """
+    pairs = _unique_common(
+        a,
+        b,
+        a_low,
+        len(a) if a_high is None else a_high,
+        b_low,
+        len(b) if b_high is None else b_high,
+    )
+    pairs.sort()
+    return len(pairs) - len(_longest_increasing(pairs))
+
+
+def estimate_cost(
+    a: Sequence[Hashable],
+    b: Sequence[Hashable],
+    engine_name: str = "myers",
+) -> int:
+    """Return rough number of comparisons engine diffing a and b would take.
+
+    Engines need about (N + M) * D for the part between the common
+    prefix and suffix, and D is at least the number of items only one
+    side has, so this never overestimates much for ordinary edits.
+    For Myers, moved unique items count twice more, as reordered code
+    makes D far larger than the items only one side has.
+    """
+    prefix, suffix = _trim_common(a, b, 0, len(a), 0, len(b))
+    a_high = len(a) - suffix
+    b_high = len(b) - suffix
+    a_items = Counter(a[index] for index in range(prefix, a_high))
+    b_items = Counter(b[index] for index in range(prefix, b_high))
+    differ = (a_items - b_items).total() + (b_items - a_items).total()
+    if engine_name == "myers":
+        differ += 2 * reordered_items(a, b, prefix, a_high, prefix, b_high)
+    return (a_items.total() + b_items.total()) * max(differ, 1)
+
+
+def block_opcodes(
+    a: Sequence[Hashable],
+    b: Sequence[Hashable],
+) -> list[Opcode]:
+    """Return opcodes keeping common prefix and suffix, replacing the rest.
+
+    Linear time fallback when an engine would take too long.
+    """
+    prefix, suffix = _trim_common(a, b, 0, len(a), 0, len(b))
+    matches: list[Match] = [(0, 0, prefix)] if prefix else []
+    if suffix:
+        matches.append((len(a) - suffix, len(b) - suffix, suffix))
+    return opcodes_from_matches(matches, len(a), len(b))
+
+
+def budgeted_opcodes(
+    engine_name: str,
+    a: Sequence[Hashable],
+    b: Sequence[Hashable],
+    max_cost: int = 0,
+    budget: float = 0.0,
+) -> tuple[list[Opcode], str]:
+    """Return opcodes from engine and name of strategy that made them.
+
+    Falls back to block_opcodes if estimate_cost is over max_cost or
+    engine runs for more than budget seconds. Zero means no limit.
+    Reordered code too costly for the engine is diffed with patience
+    instead, if that is estimated to fit.
+    """
+    strategy = engine_name
+    if max_cost and estimate_cost(a, b, engine_name) > max_cost:
+        if engine_name == "patience" or (
+            estimate_cost(a, b, "patience") > max_cost
+        ):
+            return block_opcodes(a, b), "block (estimate)"
+        engine_name = "patience"
+        strategy = "patience (reorder)"
+    token = _DEADLINE.set(time.perf_counter() + budget if budget else None)
+    try:
+        return DIFF_ENGINES[engine_name](a, b), strategy
+    except DiffTimeoutError:
+        return block_opcodes(a, b), "block (timeout)"
+    finally:
+        _DEADLINE.reset(token)
@@ -0,0 +1,338 @@
+"""Edits - Turn diff opcodes into as few Tk text edits as possible."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# IdleReload - Reload File Contents IDLE Extension.
+# Copyright (C) 2023-2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "Edits"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+import re
+from contextlib import contextmanager
+from idlelib.delegator import Delegator
+from typing import TYPE_CHECKING, Final, NamedTuple, cast
+
+from idlereload.diff import myers_opcodes
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Iterable, Sequence
+    from tkinter import Text
+
+    from idlereload.diff import Opcode
+
+
+class Edit(NamedTuple):
+    """Replace text between start and end Tk indexes with chars.
+
+    Indexes refer to the text before any edit of a batch is applied,
+    which stays true as long as edits are applied from last to first.
+    """
+
+    start: str
+    end: str
+    chars: str
+
+
+# How replaced lines are split before diffing them, line means not at all
+GRANULARITY_PATTERNS: Final[dict[str, re.Pattern[str] | None]] = {
+    "line": None,
+    "word": re.compile(r"\w+|\s+|[^\w\s]"),
+    "char": re.compile(r".", re.DOTALL),
+}
+# Lines changed in more places than this are replaced as one span
+MAX_LINE_EDITS = 4
+# Changed spans longer than this are not diffed, like minified code
+MAX_REFINE_CHARS = 2000
+
+
+def split_lines(content: str) -> list[str]:
+    """Return content split the same way Tk counts lines.
+
+    Unlike str.splitlines, only newlines end a line and a trailing
+    newline gives a final empty line, so index i is always Tk line i + 1.
+    Carriage returns are translated like files opened in text mode.
+    """
+    if "\r" in content:
+        content = content.replace("\r\n", "\n").replace("\r", "\n")
+    return content.split("\n")
+
+
+def coalesce_opcodes(opcodes: Iterable[Opcode]) -> list[Opcode]:
+    """Return changed ranges with adjacent non-equal opcodes joined."""
+    changes: list[Opcode] = []
+    for tag, a_low, a_high, b_low, b_high in opcodes:
+        if tag == "equal":
+            continue
+        if changes:
+            _, last_a_low, last_a_high, last_b_low, last_b_high = changes[-1]
+            if last_a_high == a_low and last_b_high == b_low:
+                changes[-1] = (
+                    "replace",
+                    last_a_low,
+                    a_high,
+                    last_b_low,
+                    b_high,
+                )
+                continue
+        changes.append((tag, a_low, a_high, b_low, b_high))
+    return changes
+
+
+def line_edit(
+    low: int,
+    high: int,
+    source_length: int,
+    inserted: Sequence[str],
+) -> Edit:
+    """Return edit replacing source lines low to high with inserted lines."""
+    if high < source_length:
+        # Every changed line is followed by a newline
+        chars = "".join(f"{line}\n" for line in inserted)
+        return Edit(f"{low + 1}.0", f"{high + 1}.0", chars)
+    if low < high and inserted:
+        # Changed lines run up to the end of the document
+        return Edit(f"{low + 1}.0", "end-1c", "\n".join(inserted))
+    if low < high:
+        # Deleting the last lines, so remove the newline before them
+        start = f"{low}.end" if low else "1.0"
+        return Edit(start, "end-1c", "")
+    # New lines after the last line
+    chars = "".join(f"\n{line}" for line in inserted)
+    return Edit("end-1c", "end-1c", chars)
+
+
+def refine_line(
+    line_no: int,
+    old: str,
+    new: str,
+    granularity: str,
+) -> list[Edit]:
+    """Return edits that turn old line into new line on Tk line line_no.
+
+    Common start and end of the lines are never touched, and what is
+    left is diffed in pieces of granularity. Too scattered changes are
+    replaced as one span.
+    """
+    if max(old, default="\0") > "\uffff" or max(new, default="\0") > "\uffff":
+        # Tk columns do not match str indexes outside the BMP
+        return [Edit(f"{line_no}.0", f"{line_no}.end", new)]
+    shortest = min(len(old), len(new))
+    prefix = 0
+    while prefix < shortest and old[prefix] == new[prefix]:
+        prefix += 1
+    limit = shortest - prefix
+    suffix = 0
+    while suffix < limit and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    old_end = len(old) - suffix
+    new_end = len(new) - suffix
+    span = [
+        Edit(
+            f"{line_no}.{prefix}",
+            f"{line_no}.{old_end}",
+            new[prefix:new_end],
+        ),
+    ]
+    pattern = GRANULARITY_PATTERNS[granularity]
+    if (
+        pattern is None
+        or prefix in (old_end, new_end)
+        or old_end + new_end - 2 * prefix > MAX_REFINE_CHARS
+    ):
+        return span
+
+    old_pieces = pattern.findall(old, prefix, old_end)
+    new_pieces = pattern.findall(new, prefix, new_end)
+    changes = [
+        opcode
+        for opcode in myers_opcodes(old_pieces, new_pieces)
+        if opcode[0] != "equal"
+    ]
+    if len(changes) <= 1 or len(changes) > MAX_LINE_EDITS:
+        return span
+    old_columns = [prefix]
+    for piece in old_pieces:
+        old_columns.append(old_columns[-1] + len(piece))
+    edits: list[Edit] = []
+    for _tag, a_low, a_high, b_low, b_high in changes:
+        edits.append(
+            Edit(
+                f"{line_no}.{old_columns[a_low]}",
+                f"{line_no}.{old_columns[a_high]}",
+                "".join(new_pieces[b_low:b_high]),
+            ),
+        )
+    return edits
+
+
+def build_edits(
+    opcodes: Iterable[Opcode],
+    source_length: int,
+    new_lines: Sequence[str],
+    source_lines: Sequence[str] = (),
+    granularity: str = "line",
+) -> list[Edit]:
+    """Return edits that turn source lines into new lines.
+
+    Source and new lines must come from split_lines. Only inserted text
+    is turned into strings, equal ranges are never touched. Unless
+    granularity is line, replaced ranges of as many lines as they are
+    replaced with are refined inside each line, which needs source_lines.
+    """
+    edits: list[Edit] = []
+    for _tag, a_low, a_high, b_low, b_high in coalesce_opcodes(opcodes):
+        if (
+            granularity != "line"
+            and a_low < a_high
+            and a_high - a_low == b_high - b_low
+        ):
+            for offset in range(a_high - a_low):
+                edits.extend(
+                    refine_line(
+                        a_low + offset + 1,
+                        source_lines[a_low + offset],
+                        new_lines[b_low + offset],
+                        granularity,
+                    ),
+                )
+            continue
+        edits.append(
+            line_edit(a_low, a_high, source_length, new_lines[b_low:b_high]),
+        )
+    return edits
+
+
+class EditGuard(Delegator):
+    """Percolator filter rejecting edits unless a reload is applying them.
+
+    Keeps the user from typing into the middle of a progressive reload
+    while still letting them scroll and read the window.
+    """
+
+    def __init__(self) -> None:
+        """Initialize guard, rejecting edits by default."""
+        super().__init__()
+        self.allow = False
+
+    def insert(
+        self,
+        index: str,
+        chars: str,
+        tags: str | tuple[str, ...] | None = None,
+    ) -> None:
+        """Insert chars if allowed, otherwise ring the bell."""
+        text = cast("Text", self.delegate)
+        if not self.allow:
+            text.bell()
+        elif tags is None:
+            text.insert(index, chars)
+        else:
+            text.insert(index, chars, tags)
+
+    def delete(self, index1: str, index2: str | None = None) -> None:
+        """Delete text if allowed, otherwise ring the bell."""
+        text = cast("Text", self.delegate)
+        if self.allow:
+            text.delete(index1, index2)
+        else:
+            text.bell()
+
+
+@contextmanager
+def bypass_filters(
+    top: Delegator,
+    bottom: object,
+) -> Generator[None, None, None]:
+    """Temporarily link top filter straight to bottom of its percolator.
+
+    Filters in between, like the colorizer, see none of the edits made
+    through top, so they have to be told what changed afterwards.
+    """
+    delegate = top.delegate
+    top.delegate = bottom
+    top.resetcache()
+    try:
+        yield None
+    finally:
+        top.delegate = delegate
+        top.resetcache()
+
+
+def changed_ranges(opcodes: Iterable[Opcode]) -> list[tuple[int, int]]:
+    """Return merged (start, end) ranges of changed lines in new text.
+
+    Deletions still count as the line their neighbours were joined on.
+    """
+    ranges: list[tuple[int, int]] = []
+    for tag, _a_low, _a_high, b_low, b_high in opcodes:
+        if tag == "equal":
+            continue
+        end = max(b_high, b_low + 1)
+        if ranges and ranges[-1][1] >= b_low:
+            ranges[-1] = (ranges[-1][0], max(ranges[-1][1], end))
+        else:
+            ranges.append((b_low, end))
+    return ranges
+
+
+def changed_lines(opcodes: Iterable[Opcode]) -> int:
+    """Return number of lines touched by opcodes."""
+    return sum(
+        max(a_high - a_low, b_high - b_low)
+        for tag, a_low, a_high, b_low, b_high in opcodes
+        if tag != "equal"
+    )
+
+
+def apply_edits(text: Text, edits: Sequence[Edit]) -> None:
+    """Apply edits to text widget from last to first."""
+    for start, end, chars in reversed(edits):
+        if start != end:
+            text.delete(start, end)
+        if chars:
+            text.insert(start, chars, ())
+
+
+def map_line(opcodes: Iterable[Opcode], line: int) -> int:
+    """Return line number in new text for line number in source text."""
+    index = line - 1
+    for tag, a_low, a_high, b_low, b_high in opcodes:
+        if index >= a_high:
+            continue
+        if tag == "equal":
+            return b_low + (index - a_low) + 1
+        # Inside a change, stay at the same offset if it still exists
+        return min(b_low + (index - a_low), max(b_low, b_high - 1)) + 1
+    return line
+
+
+def verify_text(text: Text, lines: Sequence[str]) -> None:
+    """Raise ValueError if text widget contents are not lines."""
+    result = split_lines(text.get("1.0", "end-1c"))
+    if len(result) == len(lines) and all(map(str.__eq__, result, lines)):
+        return
+    for index, (got, expected) in enumerate(zip(result, lines, strict=False)):
+        if got != expected:
+            raise ValueError(
+                f"Line {index + 1} is {got!r}, expected {expected!r}",
+            )
+    raise ValueError(
+        f"Reloaded text has {len(result)} lines, expected {len(lines)}",
+    )
@@ -0,0 +1,299 @@
+"""Extensions - Reload only extension modules that changed."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# IdleReload - Reload File Contents IDLE Extension.
+# Copyright (C) 2023-2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "Extensions"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+import ast
+import importlib
+import importlib.util
+import json
+import os
+import py_compile
+import subprocess
+import sys
+from graphlib import CycleError, TopologicalSorter
+from typing import TYPE_CHECKING, NamedTuple
+
+from idlereload.watch import get_signature
+
+if TYPE_CHECKING:
+    from collections.abc import Collection, Iterable, Mapping
+    from types import ModuleType
+
+    from idlereload.watch import StatSignature
+
+
+class ModuleRecord(NamedTuple):
+    """Source file state of a module when it was last (re)loaded."""
+
+    filename: str
+    signature: StatSignature | None
+    # None until source is parsed
+    imports: frozenset[str] | None
+
+
+# Fewer changed files than this are compiled without starting processes
+PROCESS_COMPILE_THRESHOLD = 4
+# Run with python -c, never with multiprocessing, which would run the
+# __main__ of IDLE again. Compiles files named in arguments after the
+# optimization level, and prints JSON object of error messages.
+COMPILE_SOURCE = """
+import json, py_compile, sys
+
+errors = {}
+for filename in sys.argv[2:]:
+    try:
+        py_compile.compile(filename, doraise=True, optimize=int(sys.argv[1]))
+    except py_compile.PyCompileError as exc:
+        errors[filename] = exc.msg
+    except OSError as exc:
+        errors[filename] = f"{filename}: {exc}"
+print(json.dumps(errors))
+"""
+
+# Kept across importlib.reload of this module, which is how changes
+# to idlereload itself get reloaded.
+# module name -> record of when it was last loaded
+_RECORDS: dict[str, ModuleRecord] = globals().get("_RECORDS", {})
+
+
+def source_filename(module: ModuleType) -> str | None:
+    """Return python source file of module, None if it has none."""
+    filename = getattr(module, "__file__", None)
+    if not isinstance(filename, str) or not filename.endswith(".py"):
+        return None
+    return filename
+
+
+def find_imports(source: str, name: str, is_package: bool) -> set[str]:
+    """Return absolute names of every module source could import.
+
+    `from package import name` could import either an attribute or a
+    submodule, so both package and package.name are included.
+    """
+    package = name if is_package else name.rpartition(".")[0]
+    imports: set[str] = set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            imports.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            module = "." * node.level + (node.module or "")
+            try:
+                base = importlib.util.resolve_name(module, package)
+            except ImportError:
+                # Relative import beyond top level package
+                continue
+            imports.add(base)
+            imports.update(f"{base}.{alias.name}" for alias in node.names)
+    return imports
+
+
+def collect_modules(roots: Collection[str]) -> dict[str, ModuleType]:
+    """Return loaded modules that are roots or inside root packages."""
+    prefixes = tuple(f"{root}." for root in roots)
+    return {
+        name: module
+        for name, module in tuple(sys.modules.items())
+        if module is not None and (name in roots or name.startswith(prefixes))
+    }
+
+
+def make_record(name: str, module: ModuleType) -> ModuleRecord | None:
+    """Return record of module source file, None if it has no source."""
+    filename = source_filename(module)
+    if filename is None:
+        return None
+    signature = get_signature(filename, 0)
+    old = _RECORDS.get(name)
+    if (
+        old is not None
+        and old.signature == signature
+        and old.imports is not None
+    ):
+        # Unchanged source, reuse parsed imports
+        return old
+    try:
+        with open(filename, "rb") as fp:
+            source = fp.read()
+        imports = find_imports(
+            source.decode("utf-8", "replace"),
+            name,
+            hasattr(module, "__path__"),
+        )
+    except (OSError, SyntaxError, ValueError):
+        imports = set()
+    return ModuleRecord(filename, signature, frozenset(imports))
+
+
+def remember_modules(roots: Collection[str]) -> None:
+    """Record source state of loaded extension modules not seen before.
+
+    Only stats files, imports are parsed the first time they are needed.
+    """
+    for name, module in collect_modules(roots).items():
+        if name in _RECORDS:
+            continue
+        filename = source_filename(module)
+        if filename is None:
+            continue
+        _RECORDS[name] = ModuleRecord(
+            filename,
+            get_signature(filename, 0),
+            None,
+        )
+
+
+def dependents(
+    changed: Iterable[str],
+    graph: Mapping[str, Collection[str]],
+) -> set[str]:
+    """Return changed modules and every module importing them, directly or not."""
+    importers: dict[str, set[str]] = {}
+    for name, imports in graph.items():
+        for imported in imports:
+            importers.setdefault(imported, set()).add(name)
+    result = set(changed)
+    stack = list(result)
+    while stack:
+        for importer in importers.get(stack.pop(), ()):
+            if importer not in result:
+                result.add(importer)
+                stack.append(importer)
+    return result
+
+
+def reload_order(
+    names: Collection[str],
+    graph: Mapping[str, Collection[str]],
+) -> list[str]:
+    """Return names sorted so modules come after the modules they import."""
+    sorter = TopologicalSorter(
+        {
+            # Packages importing their own submodules import themselves
+            name: (set(graph.get(name, ())) & set(names)) - {name}
+            for name in names
+        },
+    )
+    try:
+        return list(sorter.static_order())
+    except CycleError:
+        # Import cycle, submodules before the packages holding them
+        return sorted(names, key=lambda name: (-name.count("."), name))
+
+
+def reload_changed(roots: Collection[str]) -> list[str]:
+    """Reload changed modules of roots and what imports them, in order.
+
+    Modules never seen by remember_modules count as changed. Return
+    names of reloaded modules.
+    """
+    modules = collect_modules(roots)
+    records: dict[str, ModuleRecord] = {}
+    changed: set[str] = set()
+    for name, module in modules.items():
+        record = make_record(name, module)
+        if record is None:
+            continue
+        old = _RECORDS.get(name)
+        if old is None or old.signature != record.signature:
+            changed.add(name)
+        records[name] = record
+    graph = {name: record.imports or () for name, record in records.items()}
+    order = reload_order(dependents(changed, graph) & set(records), graph)
+    for name in order:
+        importlib.reload(modules[name])
+        _RECORDS[name] = records[name]
+    # Only now that everything reloaded, keep the parsed imports
+    _RECORDS.update(records)
+    return order
+
+
+def changed_sources(roots: Collection[str]) -> list[str]:
+    """Return source files of modules of roots changed since last load."""
+    filenames: list[str] = []
+    for name, module in collect_modules(roots).items():
+        filename = source_filename(module)
+        if filename is None:
+            continue
+        old = _RECORDS.get(name)
+        if old is None or old.signature != get_signature(filename, 0):
+            filenames.append(filename)
+    return filenames
+
+
+def compile_source(filename: str) -> str | None:
+    """Compile source file to bytecode cache. Return error or None."""
+    try:
+        py_compile.compile(filename, doraise=True)
+    except py_compile.PyCompileError as exc:
+        return exc.msg
+    except OSError as exc:
+        return f"{filename}: {exc}"
+    return None
+
+
+def precompile(filenames: Collection[str]) -> dict[str, str]:
+    """Compile source files to bytecode, in parallel if there are many.
+
+    Reloading then only loads the cached bytecode instead of compiling
+    on the Tk thread. Return error message for each file that failed.
+    """
+    if len(filenames) < PROCESS_COMPILE_THRESHOLD:
+        results = [compile_source(filename) for filename in filenames]
+        return {
+            filename: error
+            for filename, error in zip(filenames, results, strict=True)
+            if error is not None
+        }
+    ordered = list(filenames)
+    workers = min(len(ordered), os.cpu_count() or 1)
+    chunks = [ordered[index::workers] for index in range(workers)]
+    processes = [
+        subprocess.Popen(  # noqa: S603
+            [
+                sys.executable,
+                "-c",
+                COMPILE_SOURCE,
+                str(sys.flags.optimize),
+                *chunk,
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        for chunk in chunks
+    ]
+    errors: dict[str, str] = {}
+    for chunk, process in zip(chunks, processes, strict=True):
+        output, error_output = process.communicate()
+        if process.returncode:
+            errors.update(dict.fromkeys(chunk, error_output.strip()))
+        else:
+            errors.update(json.loads(output))
+    return {
+        filename: errors[filename]
+        for filename in ordered
+        if filename in errors
+    }
@@ -0,0 +1,173 @@
+"""Handlers - Time event handlers of every extension."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# IdleReload - Reload File Contents IDLE Extension.
+# Copyright (C) 2023-2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "Handlers"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+import time
+from functools import update_wrapper
+from idlelib.config import idleConf
+from typing import TYPE_CHECKING, Final
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from idlelib.editor import EditorWindow
+
+# (extension, handler) -> timings, kept across reloads of this module
+_TIMINGS: dict[tuple[str, str], HandlerTimings] = globals().get(
+    "_TIMINGS",
+    {},
+)
+
+
+class HandlerTimings:
+    """Call count and time spent in one event handler."""
+
+    __slots__ = ("calls", "max", "slow", "total")
+
+    def __init__(self) -> None:
+        """Initialize with no calls."""
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        # Calls that took longer than the threshold
+        self.slow = 0
+
+    def __repr__(self) -> str:
+        """Return representation of self."""
+        return (
+            f"{self.__class__.__name__}(calls={self.calls}, "
+            f"total={self.total:.6f}, max={self.max:.6f})"
+        )
+
+    @property
+    def mean(self) -> float:
+        """Average seconds per call."""
+        return self.total / self.calls if self.calls else 0.0
+
+
+# Report column -> how to sort rows by it, slowest first
+SORT_KEYS: Final[dict[str, Callable[[HandlerTimings], float]]] = {
+    "max": lambda timings: timings.max,
+    "mean": lambda timings: timings.mean,
+    "total": lambda timings: timings.total,
+    "calls": lambda timings: timings.calls,
+    "slow": lambda timings: timings.slow,
+}
+
+
+def timed_handler(
+    extension: str,
+    name: str,
+    handler: Callable[..., object],
+    threshold: float,
+    on_slow: Callable[[str, str, float], object],
+) -> Callable[..., object]:
+    """Return handler wrapped to record how long every call takes.
+
+    on_slow is called with extension, handler name and seconds for
+    calls taking longer than threshold seconds.
+    """
+    timings = _TIMINGS.get((extension, name))
+    if timings is None:
+        timings = _TIMINGS[extension, name] = HandlerTimings()
+    perf_counter = time.perf_counter
+
+    def wrapper(*args: object) -> object:
+        """Call handler, recording the time it took."""
+        start = perf_counter()
+        try:
+            return handler(*args)
+        finally:
+            elapsed = perf_counter() - start
+            timings.calls += 1
+            timings.total += elapsed
+            timings.max = max(timings.max, elapsed)
+            if elapsed > threshold:
+                timings.slow += 1
+                on_slow(extension, name, elapsed)
+
+    update_wrapper(wrapper, handler)
+    return wrapper
+
+
+def time_extension_handlers(
+    editwin: EditorWindow,
+    threshold: float,
+    on_slow: Callable[[str, str, float], object],
+) -> int:
+    """Bind event handlers of every extension of window through timers.
+
+    Rebinds the same virtual events EditorWindow.load_extension bound,
+    so it has to run again whenever extensions are loaded. Return
+    number of handlers wrapped.
+    """
+    count = 0
+    for name, extension in editwin.extensions.items():
+        for event in idleConf.GetExtensionBindings(name):
+            method_name = event.strip("<>").replace("-", "_") + "_event"
+            handler = getattr(extension, method_name, None)
+            if not callable(handler):
+                continue
+            editwin.text.bind(
+                event,
+                timed_handler(name, method_name, handler, threshold, on_slow),
+            )
+            count += 1
+    return count
+
+
+def handler_report(sort: str = "max") -> str:
+    """Return table of handler timings, extensions with slowest first.
+
+    Rows and extensions are ordered by sort, one of SORT_KEYS.
+    """
+    if not _TIMINGS:
+        return "No event handlers timed yet."
+    key = SORT_KEYS.get(sort, SORT_KEYS["max"])
+    extensions: dict[str, list[tuple[str, HandlerTimings]]] = {}
+    for (extension, name), timings in _TIMINGS.items():
+        extensions.setdefault(extension, []).append((name, timings))
+    for rows in extensions.values():
+        rows.sort(key=lambda row: key(row[1]), reverse=True)
+    ordered = sorted(
+        extensions.items(),
+        key=lambda item: key(item[1][0][1]),
+        reverse=True,
+    )
+
+    header = (
+        f"{'handler':<40}{'calls':>8}{'slow':>6}"
+        f"{'mean ms':>10}{'max ms':>10}{'total ms':>10}"
+    )
+    sections: list[str] = []
+    for extension, rows in ordered:
+        lines = [extension, header]
+        lines.extend(
+            f"{name:<40}{timings.calls:>8}{timings.slow:>6}"
+            f"{timings.mean * 1000:>10.2f}{timings.max * 1000:>10.2f}"
+            f"{timings.total * 1000:>10.1f}"
+            for name, timings in rows
+        )
+        sections.append("\n".join(lines))
+    return "\n\n".join(sections)
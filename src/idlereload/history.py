@@ -0,0 +1,162 @@
+"""History - Compact undo records for reloads."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# IdleReload - Reload File Contents IDLE Extension.
+# Copyright (C) 2023-2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "History"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+import zlib
+from array import array
+from idlelib.undo import Command
+from typing import TYPE_CHECKING
+
+from idlereload.edits import apply_edits, line_edit
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from idlelib.undo import UndoDelegator
+    from tkinter import Text
+
+    from idlereload.diff import Opcode
+    from idlereload.edits import Edit
+
+
+def compress_lines(lines: Sequence[str]) -> bytes:
+    """Return lines joined and compressed."""
+    return zlib.compress("\n".join(lines).encode("utf-8", "surrogatepass"))
+
+
+def decompress_lines(data: bytes, count: int) -> list[str]:
+    """Return count lines from compress_lines data."""
+    if not count:
+        return []
+    return zlib.decompress(data).decode("utf-8", "surrogatepass").split("\n")
+
+
+class ReloadCommand(Command):
+    """Undo record of a whole reload.
+
+    Instead of every deleted and inserted string and the marks around
+    each edit, only the changed line ranges and a compressed copy of
+    the lines in them on both sides are kept.
+    """
+
+    def __init__(
+        self,
+        changes: Sequence[Opcode],
+        old_lines: Sequence[str],
+        new_lines: Sequence[str],
+    ) -> None:
+        """Initialize from coalesced changes turning old lines into new."""
+        # a_low, a_high, b_low, b_high of every change one after another
+        self.changes = array("q")
+        old_changed: list[str] = []
+        new_changed: list[str] = []
+        for _tag, a_low, a_high, b_low, b_high in changes:
+            self.changes.extend((a_low, a_high, b_low, b_high))
+            old_changed.extend(old_lines[a_low:a_high])
+            new_changed.extend(new_lines[b_low:b_high])
+        self.old_length = len(old_lines)
+        self.new_length = len(new_lines)
+        self.old_count = len(old_changed)
+        self.new_count = len(new_changed)
+        self.old = compress_lines(old_changed)
+        self.new = compress_lines(new_changed)
+
+    def __repr__(self) -> str:
+        """Return representation of self."""
+        name = self.__class__.__name__
+        changes = len(self.changes) // 4
+        return f"{name}({changes} changes, {self.size} bytes)"
+
+    @property
+    def size(self) -> int:
+        """Approximate number of bytes held by this record."""
+        return (
+            len(self.old)
+            + len(self.new)
+            + self.changes.itemsize * len(self.changes)
+        )
+
+    def edits(self, undo: bool) -> list[Edit]:
+        """Return edits going back to old lines if undo, else to new lines."""
+        if undo:
+            lines = decompress_lines(self.old, self.old_count)
+            source_length = self.new_length
+        else:
+            lines = decompress_lines(self.new, self.new_count)
+            source_length = self.old_length
+        edits: list[Edit] = []
+        position = 0
+        for index in range(0, len(self.changes), 4):
+            a_low, a_high, b_low, b_high = self.changes[index : index + 4]
+            if undo:
+                low, high, count = b_low, b_high, a_high - a_low
+            else:
+                low, high, count = a_low, a_high, b_high - b_low
+            inserted = lines[position : position + count]
+            edits.append(line_edit(low, high, source_length, inserted))
+            position += count
+        return edits
+
+    def apply(self, text: Text, undo: bool) -> None:
+        """Apply edits to text and put the cursor on the first change."""
+        apply_edits(text, self.edits(undo))
+        if self.changes:
+            line = (self.changes[0] if undo else self.changes[2]) + 1
+            text.mark_set("insert", f"{line}.0")
+        text.see("insert")
+
+    def do(self, text: Text) -> None:
+        """Nothing to do, reloads are applied before they are recorded."""
+
+    def redo(self, text: Text) -> None:
+        """Change text back into reloaded contents."""
+        self.apply(text, False)
+
+    def undo(self, text: Text) -> None:
+        """Change text back into contents from before reload."""
+        self.apply(text, True)
+
+
+def trim_undo(undo: UndoDelegator, limit: int) -> int:
+    """Forget oldest undo history once reload records go over limit bytes.
+
+    Return number of undo entries dropped.
+    """
+    total = 0
+    drop = 0
+    for index in range(len(undo.undolist) - 1, -1, -1):
+        command = undo.undolist[index]
+        if isinstance(command, ReloadCommand):
+            total += command.size
+            if total > limit:
+                drop = min(index + 1, undo.pointer)
+                break
+    if not drop:
+        return 0
+    del undo.undolist[:drop]
+    undo.pointer -= drop
+    if undo.saved >= 0:
+        undo.saved = max(undo.saved - drop, -1)
+    undo.check_saved()
+    return drop
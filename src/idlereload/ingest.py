@@ -0,0 +1,127 @@
+"""Ingest - Read files for reloading with as few copies as possible."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# IdleReload - Reload File Contents IDLE Extension.
+# Copyright (C) 2023-2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "Ingest"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+import hashlib
+import mmap
+import os
+from array import array
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, overload
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+# Files at least this big are mapped instead of read into memory
+MMAP_THRESHOLD = 1 << 20
+
+
+def hash_bytes(data: bytes | mmap.mmap) -> bytes:
+    """Return content fingerprint digest of data."""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class FileTooLargeError(OSError):
+    """Raised when a file is over the size reloading is allowed to read."""
+
+
+class FileLines(Sequence[str]):
+    """Lines of text as offsets into it, the way split_lines splits them.
+
+    Lines are only copied out of the text when they are looked at.
+    """
+
+    __slots__ = ("starts", "text")
+
+    def __init__(self, text: str) -> None:
+        """Initialize from text, carriage returns are translated."""
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        self.text = text
+        # Start of every line, plus one past the end of the last line
+        self.starts = array("Q", [0])
+        find = text.find
+        index = find("\n")
+        while index != -1:
+            self.starts.append(index + 1)
+            index = find("\n", index + 1)
+        self.starts.append(len(text) + 1)
+
+    def __repr__(self) -> str:
+        """Return representation of self."""
+        return f"{self.__class__.__name__}(<{len(self)} lines>)"
+
+    def __len__(self) -> int:
+        """Return number of lines."""
+        return len(self.starts) - 1
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[str]: ...
+
+    def __getitem__(self, index: int | slice) -> str | list[str]:
+        """Return line at index, or list of lines of slice."""
+        if isinstance(index, slice):
+            return [self[line] for line in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("line index out of range")
+        return self.text[self.starts[index] : self.starts[index + 1] - 1]
+
+    def __iter__(self) -> Iterator[str]:
+        """Yield every line."""
+        text = self.text
+        starts = self.starts
+        for index in range(len(starts) - 1):
+            yield text[starts[index] : starts[index + 1] - 1]
+
+
+def read_file(
+    filename: str,
+    encoding: str,
+    max_size: int = 0,
+) -> tuple[bytes, FileLines, int]:
+    """Return content digest, lines and size of file decoded in one pass.
+
+    Encoding should be the one IOBinding detected when loading the
+    file. Large files are mapped, so the only full copy of the contents
+    ever made is the decoded text. Raise FileTooLargeError if file is
+    bigger than max_size bytes, unless max_size is zero.
+    """
+    with open(filename, "rb", buffering=0) as file:
+        size = os.fstat(file.fileno()).st_size
+        if max_size and size > max_size:
+            raise FileTooLargeError(
+                f"{filename!r} is {size} bytes, over limit of {max_size}",
+            )
+        if size < MMAP_THRESHOLD:
+            data = file.read()
+            return hash_bytes(data), FileLines(str(data, encoding)), size
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            lines = FileLines(str(mapped, encoding))
+            return hash_bytes(mapped), lines, size
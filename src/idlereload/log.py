@@ -0,0 +1,213 @@
+"""Log - Write extension log from a background thread."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# IdleReload - Reload File Contents IDLE Extension.
+# Copyright (C) 2023-2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "Log"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+import atexit
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+# Rotate once log is bigger than this many bytes or older than this
+MAX_BYTES = 1 << 20
+MAX_AGE = 30 * 24 * 60 * 60
+# Rotated logs kept as name.log.1 (newest) to name.log.BACKUP_COUNT
+BACKUP_COUNT = 3
+# Seconds to wait for more messages before writing a batch
+BATCH_DELAY = 0.2
+TIME_FORMAT = "[%Y-%m-%d %H:%M:%S] "
+
+# Kept across importlib.reload of this module, so reloading extensions
+# does not start another writer thread for the same file.
+_WRITERS: dict[Path, LogWriter] = globals().get("_WRITERS", {})
+
+
+class LogWriter:
+    """Append timestamped messages to a log file from a daemon thread.
+
+    Callers only put messages on a queue, so logging from the Tk thread
+    never waits on a slow home directory. The writer thread gathers
+    messages for up to BATCH_DELAY seconds and writes them in one go,
+    rotating the file once it is too big or too old.
+    """
+
+    __slots__ = (
+        "backup_count",
+        "lock",
+        "max_age",
+        "max_bytes",
+        "path",
+        "queue",
+        "started",
+    )
+
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: int = MAX_BYTES,
+        max_age: float = MAX_AGE,
+        backup_count: int = BACKUP_COUNT,
+    ) -> None:
+        """Initialize writer, thread is started by first write."""
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.backup_count = backup_count
+        self.queue: queue.SimpleQueue[tuple[float, str] | threading.Event] = (
+            queue.SimpleQueue()
+        )
+        self.lock = threading.Lock()
+        self.started = False
+
+    def __repr__(self) -> str:
+        """Return representation of self."""
+        return f"{self.__class__.__name__}({self.path!r})"
+
+    def start(self) -> None:
+        """Start writer thread if it is not running yet."""
+        with self.lock:
+            if self.started:
+                return
+            self.started = True
+        threading.Thread(
+            target=self.run,
+            name=f"{__name__}.{self.path.name}",
+            daemon=True,
+        ).start()
+        atexit.register(self.flush)
+
+    def write(self, content: str) -> None:
+        """Queue content to be written with the current time."""
+        self.start()
+        self.queue.put((time.time(), content))
+
+    def flush(self, timeout: float | None = 1.0) -> bool:
+        """Wait until everything queued so far is written.
+
+        Return False if timeout ran out first.
+        """
+        if not self.started:
+            return True
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def run(self) -> None:
+        """Write batches of queued messages forever. Runs in writer thread."""
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + BATCH_DELAY
+            # Flush requests do not wait for more messages
+            while not isinstance(batch[-1], threading.Event):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            messages = [item for item in batch if isinstance(item, tuple)]
+            try:
+                if messages:
+                    self.write_batch(messages)
+            except OSError as exc:
+                print(f"[{__package__}] Could not write {self.path}: {exc}")
+            finally:
+                for item in batch:
+                    if isinstance(item, threading.Event):
+                        item.set()
+
+    def format_batch(self, messages: list[tuple[float, str]]) -> str:
+        """Return messages as log lines, each line prefixed with its time."""
+        lines: list[str] = []
+        for timestamp, content in messages:
+            format_time = time.strftime(TIME_FORMAT, time.localtime(timestamp))
+            lines.extend(
+                f"{format_time}{line}"
+                for line in content.splitlines(keepends=True)
+            )
+            if lines and not lines[-1].endswith("\n"):
+                lines[-1] += "\n"
+        return "".join(lines)
+
+    def write_batch(self, messages: list[tuple[float, str]]) -> None:
+        """Append messages to log file, rotating it first if needed."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.should_rotate():
+            self.rotate()
+        with self.path.open("a", encoding="utf-8") as fp:
+            fp.write(self.format_batch(messages))
+
+    def oldest_time(self) -> float | None:
+        """Return time of first line of log file, or None if unknown."""
+        try:
+            with self.path.open(encoding="utf-8") as fp:
+                first = fp.readline()
+        except (OSError, UnicodeDecodeError):
+            return None
+        try:
+            return time.mktime(
+                time.strptime(
+                    first[: len("[YYYY-mm-dd HH:MM:SS] ")],
+                    TIME_FORMAT,
+                ),
+            )
+        except ValueError:
+            return None
+
+    def should_rotate(self) -> bool:
+        """Return if log file is too big or too old."""
+        try:
+            size = self.path.stat().st_size
+        except OSError:
+            return False
+        if size >= self.max_bytes:
+            return True
+        oldest = self.oldest_time()
+        return oldest is not None and time.time() - oldest >= self.max_age
+
+    def rotate(self) -> None:
+        """Shift name.log to name.log.1 and so on, dropping the oldest."""
+        if self.backup_count <= 0:
+            self.path.unlink(missing_ok=True)
+            return
+        for number in range(self.backup_count - 1, 0, -1):
+            source = self.path.with_name(f"{self.path.name}.{number}")
+            if source.exists():
+                source.replace(
+                    self.path.with_name(f"{self.path.name}.{number + 1}"),
+                )
+        self.path.replace(self.path.with_name(f"{self.path.name}.1"))
+
+
+def get_log_writer(path: Path) -> LogWriter:
+    """Return shared log writer for path."""
+    writer = _WRITERS.get(path)
+    if writer is None:
+        writer = _WRITERS[path] = LogWriter(path)
+    return writer
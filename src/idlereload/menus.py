@@ -0,0 +1,275 @@
+"""Menus - Update extension menus and key bindings in place."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# IdleReload - Reload File Contents IDLE Extension.
+# Copyright (C) 2023-2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "Menus"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+from difflib import SequenceMatcher
+from idlelib.config import idleConf
+from idlelib.editor import get_accelerator, prepstr
+from tkinter import BooleanVar
+from typing import TYPE_CHECKING, NamedTuple, TypeAlias, cast
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+    from idlelib.editor import EditorWindow
+    from tkinter import Menu, Text
+
+# (label, virtual event) or None for a separator
+MenuEntry: TypeAlias = tuple[str, str] | None
+# Menu entry and its accelerator text
+MenuItem: TypeAlias = tuple[MenuEntry, str]
+
+
+class ExtensionUI(NamedTuple):
+    """Menu entries and key bindings an extension adds to a window."""
+
+    # menu name -> entries, in the order fill_menus adds them
+    menus: dict[str, tuple[MenuEntry, ...]]
+    # virtual event -> key sequences
+    keydefs: dict[str, tuple[str, ...]]
+
+
+def extension_ui(editwin: EditorWindow) -> dict[str, ExtensionUI]:
+    """Return menus and bindings of every loaded extension of window."""
+    result: dict[str, ExtensionUI] = {}
+    for name, extension in editwin.extensions.items():
+        menus: dict[str, tuple[MenuEntry, ...]] = {}
+        for menu_name, entries in getattr(extension, "menudefs", ()):
+            menus[menu_name] = menus.get(menu_name, ()) + tuple(
+                None if entry is None else (entry[0], entry[1])
+                for entry in entries
+            )
+        keydefs = {
+            event: tuple(keys)
+            for event, keys in idleConf.GetExtensionBindings(name).items()
+        }
+        result[name] = ExtensionUI(menus, keydefs)
+    return result
+
+
+def merge_keydefs(ui: Iterable[ExtensionUI]) -> dict[str, set[str]]:
+    """Return key sequences of every virtual event of extensions."""
+    merged: dict[str, set[str]] = {}
+    for extension in ui:
+        for event, keys in extension.keydefs.items():
+            merged.setdefault(event, set()).update(keys)
+    return merged
+
+
+def diff_bindings(
+    old: Mapping[str, ExtensionUI],
+    new: Mapping[str, ExtensionUI],
+) -> tuple[dict[str, set[str]], dict[str, set[str]], set[str]]:
+    """Return key sequences to remove and add per event, and removed events."""
+    old_keys = merge_keydefs(old.values())
+    new_keys = merge_keydefs(new.values())
+    removed: dict[str, set[str]] = {}
+    for event, keys in old_keys.items():
+        gone = keys - new_keys.get(event, set())
+        if gone:
+            removed[event] = gone
+    added: dict[str, set[str]] = {}
+    for event, keys in new_keys.items():
+        extra = keys - old_keys.get(event, set())
+        if extra:
+            added[event] = extra
+    return removed, added, old_keys.keys() - new_keys.keys()
+
+
+def update_bindings(
+    text: Text,
+    old: Mapping[str, ExtensionUI],
+    new: Mapping[str, ExtensionUI],
+) -> None:
+    """Only add and remove key sequences that changed between old and new."""
+    removed, added, gone_events = diff_bindings(old, new)
+    for event, keys in removed.items():
+        text.event_delete(event, *keys)
+    for event in gone_events:
+        # Nothing generates it anymore, drop handler of closed instance
+        text.unbind(event)
+    for event, keys in added.items():
+        text.event_add(event, *keys)
+
+
+def menu_items(
+    entries: Iterable[MenuEntry],
+    keydefs: Mapping[str, tuple[str, ...]],
+) -> list[MenuItem]:
+    """Return entries with the accelerator fill_menus would give them."""
+    keys = cast("dict[str, str]", keydefs)
+    return [
+        (entry, "" if entry is None else get_accelerator(keys, entry[1]))
+        for entry in entries
+    ]
+
+
+def entry_label(entry: MenuEntry) -> str | None:
+    """Return label Tk shows for entry, None for separators."""
+    if entry is None:
+        return None
+    return prepstr(entry[0].removeprefix("!"))[1]
+
+
+def menu_labels(menu: Menu) -> list[str | None]:
+    """Return label of every item of menu, None for items without one."""
+    last = menu.index("end")
+    if last is None:
+        return []
+    labels: list[str | None] = []
+    for index in range(last + 1):
+        if menu.type(index) in {"separator", "tearoff"}:
+            labels.append(None)
+        else:
+            labels.append(str(menu.entrycget(index, "label")))
+    return labels
+
+
+def find_entries(menu: Menu, entries: tuple[MenuEntry, ...]) -> int | None:
+    """Return index of last place entries are in menu, None if not found."""
+    labels = menu_labels(menu)
+    wanted = [entry_label(entry) for entry in entries]
+    for start in range(len(labels) - len(wanted), -1, -1):
+        if labels[start : start + len(wanted)] == wanted:
+            return start
+    return None
+
+
+def insert_entry(
+    editwin: EditorWindow,
+    menu: Menu,
+    index: int,
+    item: MenuItem,
+) -> None:
+    """Insert menu item at index the same way fill_menus adds it."""
+    entry, accelerator = item
+    if entry is None:
+        menu.insert_separator(index)
+        return
+    label, eventname = entry
+    checkbutton = label.startswith("!")
+    underline, label = prepstr(label.removeprefix("!"))
+    text = editwin.text
+
+    def command(text: Text = text, eventname: str = eventname) -> None:
+        text.event_generate(eventname)
+
+    if checkbutton:
+        # Stubs expect a variable instance, IDLE passes the class
+        var = editwin.get_var_obj(eventname, BooleanVar)  # type: ignore[arg-type]
+        menu.insert_checkbutton(
+            index,
+            label=label,
+            underline=underline,
+            command=command,
+            accelerator=accelerator,
+            variable=cast("BooleanVar", var),
+        )
+    else:
+        menu.insert_command(
+            index,
+            label=label,
+            underline=underline,
+            command=command,
+            accelerator=accelerator,
+        )
+
+
+def update_menu(
+    editwin: EditorWindow,
+    menu: Menu,
+    old: list[MenuItem],
+    new: list[MenuItem],
+) -> None:
+    """Edit items of one extension in menu from old into new."""
+    if old == new:
+        return
+    start = (
+        find_entries(menu, tuple(entry for entry, _ in old)) if old else None
+    )
+    if start is None:
+        # Never added or moved by someone else, add at the end like IDLE
+        last = menu.index("end")
+        start = 0 if last is None else last + 1
+        old = []
+    matcher = SequenceMatcher(
+        None,
+        [None if entry is None else entry[1] for entry, _ in old],
+        [None if entry is None else entry[1] for entry, _ in new],
+        autojunk=False,
+    )
+    # From the bottom up, so indexes of earlier items do not move
+    for tag, a_low, a_high, b_low, b_high in reversed(matcher.get_opcodes()):
+        if tag == "equal":
+            for offset in range(a_high - a_low):
+                old_entry, old_accelerator = old[a_low + offset]
+                entry, accelerator = new[b_low + offset]
+                if entry is None or (entry, accelerator) == (
+                    old_entry,
+                    old_accelerator,
+                ):
+                    continue
+                underline, label = prepstr(entry[0].removeprefix("!"))
+                menu.entryconfigure(
+                    start + a_low + offset,
+                    label=label,
+                    underline=underline,
+                    accelerator=accelerator,
+                )
+            continue
+        if a_high > a_low:
+            menu.delete(start + a_low, start + a_high - 1)
+        for offset, item in enumerate(new[b_low:b_high]):
+            insert_entry(editwin, menu, start + a_low + offset, item)
+
+
+def update_menus(
+    editwin: EditorWindow,
+    old: Mapping[str, ExtensionUI],
+    new: Mapping[str, ExtensionUI],
+) -> None:
+    """Only add, remove and relabel menu items that changed."""
+    for name in [*old, *(name for name in new if name not in old)]:
+        old_ui = old.get(name, ExtensionUI({}, {}))
+        new_ui = new.get(name, ExtensionUI({}, {}))
+        for menu_name in {**old_ui.menus, **new_ui.menus}:
+            menu = editwin.menudict.get(menu_name)
+            if not menu:
+                continue
+            update_menu(
+                editwin,
+                menu,
+                menu_items(old_ui.menus.get(menu_name, ()), old_ui.keydefs),
+                menu_items(new_ui.menus.get(menu_name, ()), new_ui.keydefs),
+            )
+
+
+def update_extension_ui(
+    editwin: EditorWindow,
+    old: Mapping[str, ExtensionUI],
+    new: Mapping[str, ExtensionUI],
+) -> None:
+    """Bring menus and key bindings of window from old to new extensions."""
+    update_bindings(editwin.text, old, new)
+    update_menus(editwin, old, new)
@@ -0,0 +1,101 @@
+"""Shell - Reload modules inside the shell execution subprocess."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# IdleReload - Reload File Contents IDLE Extension.
+# Copyright (C) 2023-2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "Shell"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from idlelib.pyshell import ModifiedInterpreter
+
+# Runs in the subprocess with FILENAME set, in its own namespace so
+# nothing leaks into the shell. Modules defined in FILENAME are reloaded
+# first, then modules holding one of them or something defined in them,
+# level by level.
+RELOAD_SOURCE = """
+import importlib, os, sys, time
+from types import ModuleType
+
+
+def source(module):
+    filename = getattr(module, "__file__", None)
+    if not isinstance(filename, str):
+        return None
+    return os.path.normcase(os.path.abspath(filename))
+
+
+def uses(module, names):
+    for value in list(vars(module).values()):
+        try:
+            if isinstance(value, ModuleType):
+                if value.__name__ in names:
+                    return True
+            elif getattr(value, "__module__", None) in names:
+                return True
+        except Exception:
+            continue
+    return False
+
+
+target = os.path.normcase(os.path.abspath(FILENAME))
+modules = [(name, module) for name, module in list(sys.modules.items())
+           if module is not None and name != "__main__"]
+level = sorted(name for name, module in modules if source(module) == target)
+if not level:
+    print(f"[idlereload] {os.path.basename(FILENAME)} is not imported")
+seen = set(level)
+while level:
+    names = set(level)
+    for name in level:
+        start = time.perf_counter()
+        try:
+            importlib.reload(sys.modules[name])
+        except Exception as exc:
+            print(f"[idlereload] {name}: {type(exc).__name__}: {exc}")
+        else:
+            taken = (time.perf_counter() - start) * 1000
+            print(f"[idlereload] Reloaded {name} in {taken:.1f} ms")
+    level = []
+    for name, module in modules:
+        if name not in seen and source(module) is not None and uses(module, names):
+            seen.add(name)
+            level.append(name)
+    level.sort()
+"""
+
+
+def reload_code(filename: str) -> str:
+    """Return code reloading modules of filename and their dependents."""
+    return f"exec({RELOAD_SOURCE!r}, {{'FILENAME': {filename!r}}})"
+
+
+def reload_in_subprocess(interp: ModifiedInterpreter, filename: str) -> bool:
+    """Reload modules of filename in shell subprocess over RPC.
+
+    Results and timings are printed in the shell. Return False if there
+    is no subprocess or the shell is busy running something.
+    """
+    if interp.rpcclt is None:
+        return False
+    return bool(interp.runcommand(reload_code(filename)))
@@ -0,0 +1,125 @@
+"""Snapshot - Compact copies of what editor windows last loaded or saved."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# IdleReload - Reload File Contents IDLE Extension.
+# Copyright (C) 2023-2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "Snapshot"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+import hashlib
+import zlib
+from array import array
+from collections import OrderedDict
+from typing import TYPE_CHECKING, NamedTuple
+
+from idlereload.ingest import FileLines
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+# Least recently used first, kept across reloads of this module
+_SNAPSHOTS: OrderedDict[str, Snapshot] = globals().get(
+    "_SNAPSHOTS",
+    OrderedDict(),
+)
+
+
+def line_hash(line: str) -> int:
+    """Return 64 bit hash of line, the same in every process."""
+    digest = hashlib.blake2b(
+        line.encode("utf-8", "surrogatepass"),
+        digest_size=8,
+    ).digest()
+    return int.from_bytes(digest, "little")
+
+
+def intern_hashes(*sequences: Sequence[int]) -> list[array[int]]:
+    """Return line hash sequences as arrays of small integer ids.
+
+    Equal hashes get equal ids in every returned array, so diffing them
+    compares machine integers instead of whole lines. Ids are only
+    shared within one call, the table is dropped once it returns.
+    """
+    ids: dict[int, int] = {}
+    result: list[array[int]] = []
+    for hashes in sequences:
+        interned = array("I")
+        for line in hashes:
+            id_ = ids.get(line)
+            if id_ is None:
+                id_ = ids[line] = len(ids)
+            interned.append(id_)
+        result.append(interned)
+    return result
+
+
+class Snapshot(NamedTuple):
+    """Buffer contents with given content digest, compressed."""
+
+    digest: bytes
+    hashes: array[int]
+    data: bytes
+
+    @classmethod
+    def from_lines(cls, lines: Sequence[str], digest: bytes) -> Snapshot:
+        """Return snapshot of lines from split_lines or FileLines."""
+        text = lines.text if isinstance(lines, FileLines) else "\n".join(lines)
+        return cls(
+            digest,
+            array("Q", map(line_hash, lines)),
+            zlib.compress(text.encode("utf-8", "surrogatepass"), 1),
+        )
+
+    @property
+    def size(self) -> int:
+        """Approximate number of bytes held by this snapshot."""
+        return len(self.data) + self.hashes.itemsize * len(self.hashes)
+
+    def lines(self) -> list[str]:
+        """Return lines snapshot was taken of."""
+        text = zlib.decompress(self.data).decode("utf-8", "surrogatepass")
+        return text.split("\n")
+
+
+def store_snapshot(key: str, snapshot: Snapshot, limit: int) -> None:
+    """Remember snapshot for key, evicting least recently used over limit.
+
+    Limit is in bytes and shared by the snapshots of every window.
+    """
+    _SNAPSHOTS.pop(key, None)
+    _SNAPSHOTS[key] = snapshot
+    total = sum(snapshot.size for snapshot in _SNAPSHOTS.values())
+    while total > limit and _SNAPSHOTS:
+        _, evicted = _SNAPSHOTS.popitem(last=False)
+        total -= evicted.size
+
+
+def get_snapshot(key: str) -> Snapshot | None:
+    """Return snapshot stored for key, if it was not evicted."""
+    snapshot = _SNAPSHOTS.get(key)
+    if snapshot is not None:
+        _SNAPSHOTS.move_to_end(key)
+    return snapshot
+
+
+def forget_snapshot(key: str) -> None:
+    """Drop snapshot stored for key."""
+    _SNAPSHOTS.pop(key, None)
@@ -0,0 +1,195 @@
+"""Stats - Timings and counts of recent reloads."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# IdleReload - Reload File Contents IDLE Extension.
+# Copyright (C) 2023-2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "Stats"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+import json
+import math
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Iterable, Sequence
+    from pathlib import Path
+
+# Most recent reloads last, kept across reloads of this module
+_RECORDS: deque[ReloadRecord] = globals().get("_RECORDS", deque(maxlen=500))
+PERCENTILES = (50, 90, 99)
+
+
+class ReloadRecord(NamedTuple):
+    """Timings and counts of one finished reload."""
+
+    # file or extensions
+    kind: str
+    name: str
+    # Unix time reload started at
+    started: float
+    # Wall clock seconds from start to finish
+    total: float
+    # Seconds spent in each phase
+    phases: dict[str, float]
+    # Like bytes read, opcodes and lines changed
+    counts: dict[str, int]
+    # Diff engine or fallback used, empty if nothing was diffed
+    strategy: str = ""
+
+
+class PhaseTimer:
+    """Collect phase timings of a reload that is still going on."""
+
+    __slots__ = (
+        "counts",
+        "kind",
+        "name",
+        "phases",
+        "start",
+        "started",
+        "strategy",
+    )
+
+    def __init__(self, kind: str, name: str) -> None:
+        """Initialize timer, starting now."""
+        self.kind = kind
+        self.name = name
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.phases: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+        self.strategy = ""
+
+    def __repr__(self) -> str:
+        """Return representation of self."""
+        return f"{self.__class__.__name__}({self.kind!r}, {self.name!r})"
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Add seconds to time spent in phase."""
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, phase: str) -> Generator[None, None, None]:
+        """Time block as phase."""
+        start = time.perf_counter()
+        try:
+            yield None
+        finally:
+            self.add(phase, time.perf_counter() - start)
+
+    def finish(self, limit: int = 500) -> ReloadRecord:
+        """Store and return record of reload, keeping up to limit records."""
+        record = ReloadRecord(
+            self.kind,
+            self.name,
+            self.started,
+            time.perf_counter() - self.start,
+            self.phases,
+            self.counts,
+            self.strategy,
+        )
+        store_record(record, limit)
+        return record
+
+
+def store_record(record: ReloadRecord, limit: int = 500) -> None:
+    """Add record, forgetting the oldest ones over limit."""
+    global _RECORDS
+    if _RECORDS.maxlen != limit:
+        _RECORDS = deque(_RECORDS, maxlen=max(limit, 1))
+    _RECORDS.append(record)
+
+
+def get_records() -> list[ReloadRecord]:
+    """Return stored records, oldest first."""
+    return list(_RECORDS)
+
+
+def percentile(values: Sequence[float], percent: float) -> float:
+    """Return nearest rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    rank = max(math.ceil(percent / 100 * len(values)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+def summarize(records: Iterable[ReloadRecord]) -> str:
+    """Return table of percentiles of every phase and count per kind."""
+    kinds: dict[str, list[ReloadRecord]] = {}
+    for record in records:
+        kinds.setdefault(record.kind, []).append(record)
+    if not kinds:
+        return "No reloads recorded yet."
+
+    header = "".join(f"{f'p{percent}':>10}" for percent in PERCENTILES)
+    sections: list[str] = []
+    for kind, group in kinds.items():
+        times: dict[str, list[float]] = {"total": []}
+        counts: dict[str, list[float]] = {}
+        strategies: dict[str, int] = {}
+        for record in group:
+            if record.strategy:
+                strategies[record.strategy] = (
+                    strategies.get(record.strategy, 0) + 1
+                )
+            times["total"].append(record.total * 1000)
+            for phase, seconds in record.phases.items():
+                times.setdefault(phase, []).append(seconds * 1000)
+            for name, count in record.counts.items():
+                counts.setdefault(name, []).append(count)
+        lines = [
+            f"{kind.capitalize()} reloads: {len(group)}",
+            f"{'milliseconds':<16}{header}{'max':>10}",
+        ]
+        for table in (times, counts):
+            if table is counts and counts:
+                lines.append(f"{'counts':<16}{header}{'max':>10}")
+            for name, values in table.items():
+                values.sort()
+                cells = "".join(
+                    f"{percentile(values, percent):>10.1f}"
+                    for percent in PERCENTILES
+                )
+                lines.append(f"{name:<16}{cells}{values[-1]:>10.1f}")
+        if strategies:
+            lines.append("strategies")
+            lines.extend(
+                f"{strategy:<16}{count:>10}"
+                for strategy, count in sorted(
+                    strategies.items(),
+                    key=lambda item: -item[1],
+                )
+            )
+        sections.append("\n".join(lines))
+    return "\n\n".join(sections)
+
+
+def export_json_lines(path: Path, records: Iterable[ReloadRecord]) -> int:
+    """Write records to path as JSON lines, return number written."""
+    written = 0
+    with path.open("w", encoding="utf-8") as file:
+        for record in records:
+            file.write(json.dumps(record._asdict()) + "\n")
+            written += 1
+    return written
@@ -0,0 +1,490 @@
+"""Watch - Notice file changes on disk."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# IdleReload - Reload File Contents IDLE Extension.
+# Copyright (C) 2023-2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "Watch"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+import threading
+import time
+from tkinter import READABLE
+from typing import TYPE_CHECKING, NamedTuple, TypeAlias
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from tkinter import Misc
+
+# From <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+# struct inotify_event {int wd; uint32_t mask, cookie, len; char name[];}
+EVENT_HEADER = struct.Struct("iIII")
+
+# Written in place, or atomically renamed into place by another program
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO
+
+# Seconds between stats of a file that just changed, and of one that never does
+MIN_POLL_INTERVAL = 0.5
+MAX_POLL_INTERVAL = 30.0
+# Seconds a stat result can be reused instead of hitting the disk again
+STAT_TTL = 0.25
+# How often the Tk thread collects changes found by the stat thread
+PUMP_INTERVAL_MS = 100
+
+_INOTIFY: InotifyWatcher | None = None
+_SCHEDULER: StatScheduler | None = None
+# filename -> (monotonic time, stat result or None if stat failed)
+_STAT_CACHE: dict[str, tuple[float, os.stat_result | None]] = {}
+_STAT_LOCK = threading.Lock()
+
+
+def cached_stat(
+    filename: str,
+    ttl: float = STAT_TTL,
+) -> os.stat_result | None:
+    """Return stat of filename or None on OSError, reusing recent results.
+
+    The stat thread of the scheduler refreshes this cache, so windows
+    asking about a watched file usually never touch the disk.
+    """
+    with _STAT_LOCK:
+        cached = _STAT_CACHE.get(filename)
+    if cached is not None and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+    try:
+        result: os.stat_result | None = os.stat(filename)
+    except OSError:
+        result = None
+    with _STAT_LOCK:
+        _STAT_CACHE[filename] = (time.monotonic(), result)
+    return result
+
+
+def forget_stat(filename: str) -> None:
+    """Remove filename from stat cache."""
+    with _STAT_LOCK:
+        _STAT_CACHE.pop(filename, None)
+
+
+class StatSignature(NamedTuple):
+    """What stat says about a file, enough to tell if it was replaced.
+
+    Float mtimes round and coarse timestamps can miss a write, so the
+    size and nanosecond mtime are compared along with inode and device,
+    which change when another program renames a new file into place.
+    """
+
+    mtime_ns: int
+    size: int
+    inode: int
+    device: int
+
+    @classmethod
+    def from_stat(cls, result: os.stat_result) -> StatSignature:
+        """Return signature from stat result."""
+        return cls(
+            result.st_mtime_ns,
+            result.st_size,
+            result.st_ino,
+            result.st_dev,
+        )
+
+    def same_file(self, other: StatSignature) -> bool:
+        """Return if other is the same file, possibly with new contents."""
+        return (self.inode, self.device) == (other.inode, other.device)
+
+
+def get_signature(
+    filename: str,
+    ttl: float = STAT_TTL,
+) -> StatSignature | None:
+    """Return stat signature of filename or None on OSError."""
+    result = cached_stat(filename, ttl)
+    if result is None:
+        return None
+    return StatSignature.from_stat(result)
+
+
+def signature_changed(
+    old: StatSignature | None,
+    new: StatSignature | None,
+) -> bool:
+    """Return if file might have changed between old and new signature.
+
+    A file appearing or disappearing counts as changed.
+    """
+    return old != new
+
+
+class InotifyWatcher:
+    """Watch files through Linux inotify, driven by the Tk event loop.
+
+    The inotify file descriptor is registered with Tk's file handler, so
+    events are read on the Tk thread as soon as they arrive, with no
+    thread or polling timer. Parent directories are watched rather than
+    files so saves that rename a new file into place are still seen.
+    Bursts of events for a file are debounced into one callback.
+    """
+
+    __slots__ = (
+        "after_id",
+        "callbacks",
+        "changed",
+        "debounce_ms",
+        "directories",
+        "fd",
+        "libc",
+        "root",
+        "watch_dirs",
+    )
+
+    def __init__(self, root: Misc, debounce_ms: int = 50) -> None:
+        """Initialize inotify instance. Raise OSError on failure."""
+        self.root = root
+        self.debounce_ms = debounce_ms
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd: int = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        # directory -> watch descriptor, and the other way around
+        self.directories: dict[str, int] = {}
+        self.watch_dirs: dict[int, str] = {}
+        self.callbacks: dict[str, list[Callable[[str], object]]] = {}
+        self.changed: set[str] = set()
+        self.after_id: str | None = None
+        if sys.platform != "win32":
+            root.tk.createfilehandler(
+                self.fd,
+                READABLE,
+                self.handle_readable,
+            )
+
+    def __repr__(self) -> str:
+        """Return representation of self."""
+        return f"{self.__class__.__name__}(fd={self.fd}, files={len(self.callbacks)})"
+
+    @property
+    def closed(self) -> bool:
+        """Return if inotify file descriptor has been closed."""
+        return self.fd < 0
+
+    def watch(self, filename: str, callback: Callable[[str], object]) -> None:
+        """Call callback with filename on the Tk thread when it changes."""
+        filename = os.path.abspath(filename)
+        directory = os.path.dirname(filename)
+        if directory not in self.directories:
+            wd = self.libc.inotify_add_watch(
+                self.fd,
+                os.fsencode(directory),
+                WATCH_MASK,
+            )
+            if wd < 0:
+                errno = ctypes.get_errno()
+                raise OSError(errno, os.strerror(errno), directory)
+            self.directories[directory] = wd
+            self.watch_dirs[wd] = directory
+        self.callbacks.setdefault(filename, []).append(callback)
+
+    def unwatch(
+        self,
+        filename: str,
+        callback: Callable[[str], object],
+    ) -> None:
+        """Stop calling callback when filename changes."""
+        filename = os.path.abspath(filename)
+        callbacks = self.callbacks.get(filename, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+        if callbacks:
+            return
+        self.callbacks.pop(filename, None)
+        directory = os.path.dirname(filename)
+        if any(os.path.dirname(name) == directory for name in self.callbacks):
+            return
+        wd = self.directories.pop(directory, None)
+        if wd is not None:
+            del self.watch_dirs[wd]
+            self.libc.inotify_rm_watch(self.fd, wd)
+        if not self.callbacks:
+            # Do not leak a descriptor per reload of this module
+            self.close()
+
+    def handle_readable(self, fd: int, mask: int) -> None:
+        """Read pending inotify events and schedule debounced callbacks."""
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            offset = 0
+            while offset + EVENT_HEADER.size <= len(data):
+                wd, event_mask, _cookie, length = EVENT_HEADER.unpack_from(
+                    data,
+                    offset,
+                )
+                offset += EVENT_HEADER.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+                if event_mask & IN_Q_OVERFLOW:
+                    # Lost events, assume everything changed
+                    self.changed.update(self.callbacks)
+                    continue
+                directory = self.watch_dirs.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+                if path in self.callbacks:
+                    self.changed.add(path)
+        if not self.changed:
+            return
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+        self.after_id = self.root.after(self.debounce_ms, self.flush)
+
+    def flush(self) -> None:
+        """Run callbacks of every file changed since the last flush."""
+        self.after_id = None
+        changed = sorted(self.changed)
+        self.changed.clear()
+        for filename in changed:
+            for callback in tuple(self.callbacks.get(filename, ())):
+                callback(filename)
+
+    def close(self) -> None:
+        """Stop watching everything and close inotify file descriptor."""
+        if self.closed:
+            return
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+        if sys.platform != "win32":
+            self.root.tk.deletefilehandler(self.fd)
+        os.close(self.fd)
+        self.fd = -1
+        self.directories.clear()
+        self.watch_dirs.clear()
+        self.callbacks.clear()
+
+
+class _PollEntry:
+    """Polling state of one file of the stat scheduler."""
+
+    __slots__ = ("due", "interval", "known", "signature")
+
+    def __init__(self) -> None:
+        """Initialize entry to be polled as soon as possible."""
+        self.due = 0.0
+        self.interval = MIN_POLL_INTERVAL
+        self.known = False
+        self.signature: StatSignature | None = None
+
+
+class StatScheduler:
+    """Watch files by stat polling in one thread shared by every window.
+
+    Fallback for where inotify is not available or cannot see changes,
+    like network filesystems. Files are stat-ed in one batch per wakeup
+    off the Tk thread, and files that stay the same are polled less and
+    less often, up to MAX_POLL_INTERVAL. The Tk thread only collects
+    changed filenames through after and runs the callbacks.
+    """
+
+    __slots__ = (
+        "after_id",
+        "callbacks",
+        "changed",
+        "entries",
+        "lock",
+        "root",
+        "stop",
+        "thread",
+        "wakeup",
+    )
+
+    def __init__(self, root: Misc) -> None:
+        """Initialize scheduler, thread is started by first watch."""
+        self.root = root
+        # Only used by the Tk thread
+        self.callbacks: dict[str, list[Callable[[str], object]]] = {}
+        self.after_id: str | None = None
+        # Shared with stat thread, guarded by lock
+        self.lock = threading.Lock()
+        self.entries: dict[str, _PollEntry] = {}
+        self.changed: set[str] = set()
+        self.wakeup = threading.Event()
+        self.stop = threading.Event()
+        self.thread: threading.Thread | None = None
+
+    def __repr__(self) -> str:
+        """Return representation of self."""
+        return f"{self.__class__.__name__}(files={len(self.callbacks)})"
+
+    @property
+    def closed(self) -> bool:
+        """Return if scheduler has been closed."""
+        return self.stop.is_set()
+
+    def watch(self, filename: str, callback: Callable[[str], object]) -> None:
+        """Call callback with filename on the Tk thread when it changes."""
+        filename = os.path.abspath(filename)
+        self.callbacks.setdefault(filename, []).append(callback)
+        with self.lock:
+            if filename in self.entries:
+                return
+            self.entries[filename] = _PollEntry()
+        if self.thread is None:
+            self.thread = threading.Thread(
+                target=self.run,
+                name=__name__,
+                daemon=True,
+            )
+            self.thread.start()
+            self.after_id = self.root.after(PUMP_INTERVAL_MS, self.pump)
+        self.wakeup.set()
+
+    def unwatch(
+        self,
+        filename: str,
+        callback: Callable[[str], object],
+    ) -> None:
+        """Stop calling callback when filename changes."""
+        filename = os.path.abspath(filename)
+        callbacks = self.callbacks.get(filename, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+        if callbacks:
+            return
+        self.callbacks.pop(filename, None)
+        with self.lock:
+            self.entries.pop(filename, None)
+            self.changed.discard(filename)
+        if not self.callbacks:
+            self.close()
+
+    def poll(self) -> float:
+        """Stat every file that is due. Return seconds until next is due."""
+        now = time.monotonic()
+        with self.lock:
+            due = [
+                name
+                for name, entry in self.entries.items()
+                if entry.due <= now
+            ]
+        # Stat outside of lock, slow filesystems must not block Tk
+        results = {filename: get_signature(filename, 0) for filename in due}
+        now = time.monotonic()
+        with self.lock:
+            for filename, signature in results.items():
+                entry = self.entries.get(filename)
+                if entry is None:
+                    continue
+                changed = signature_changed(entry.signature, signature)
+                if entry.known and changed:
+                    self.changed.add(filename)
+                    entry.interval = MIN_POLL_INTERVAL
+                elif entry.known:
+                    # Back off on files that are not changing
+                    entry.interval = min(entry.interval * 2, MAX_POLL_INTERVAL)
+                entry.signature = signature
+                entry.known = True
+                entry.due = now + entry.interval
+            next_due = min(
+                (entry.due for entry in self.entries.values()),
+                default=now + MAX_POLL_INTERVAL,
+            )
+        return max(0.0, next_due - now)
+
+    def run(self) -> None:
+        """Poll files until closed. Runs in the stat thread."""
+        while not self.stop.is_set():
+            self.wakeup.clear()
+            timeout = self.poll()
+            self.wakeup.wait(timeout)
+
+    def pump(self) -> None:
+        """Run callbacks of files the stat thread found changed."""
+        self.after_id = self.root.after(PUMP_INTERVAL_MS, self.pump)
+        with self.lock:
+            changed = sorted(self.changed)
+            self.changed.clear()
+        for filename in changed:
+            for callback in tuple(self.callbacks.get(filename, ())):
+                callback(filename)
+
+    def close(self) -> None:
+        """Stop watching everything and let stat thread exit."""
+        if self.closed:
+            return
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+        self.stop.set()
+        # Not joined, a hung network filesystem would hang Tk too
+        self.wakeup.set()
+        self.callbacks.clear()
+        with self.lock:
+            self.entries.clear()
+            self.changed.clear()
+
+
+Watcher: TypeAlias = InotifyWatcher | StatScheduler
+
+
+def get_watcher(
+    root: Misc,
+    debounce_ms: int | None = None,
+    backend: str = "auto",
+) -> Watcher | None:
+    """Return shared file watcher, or None if backend is unavailable.
+
+    Backend is inotify, stat, or auto to use inotify where available and
+    fall back to the stat scheduler. If debounce_ms is given, it replaces
+    the debounce time of the inotify watcher.
+    """
+    global _INOTIFY, _SCHEDULER
+    if backend in {"auto", "inotify"} and sys.platform.startswith("linux"):
+        if _INOTIFY is None or _INOTIFY.closed:
+            try:
+                _INOTIFY = InotifyWatcher(root)
+            except (OSError, AttributeError):
+                # AttributeError if libc has no inotify functions
+                _INOTIFY = None
+        if _INOTIFY is not None:
+            if debounce_ms is not None:
+                _INOTIFY.debounce_ms = debounce_ms
+            return _INOTIFY
+    if backend not in {"auto", "stat"}:
+        return None
+    if _SCHEDULER is None or _SCHEDULER.closed:
+        _SCHEDULER = StatScheduler(root)
+    return _SCHEDULER
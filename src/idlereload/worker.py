@@ -0,0 +1,273 @@
+"""Worker - Read and diff files off the Tk main loop."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# IdleReload - Reload File Contents IDLE Extension.
+# Copyright (C) 2023-2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "Worker"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+import hashlib
+import json
+import pickle
+import subprocess
+import sys
+import time
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, NamedTuple
+
+from idlereload.diff import budgeted_opcodes
+from idlereload.edits import Edit, build_edits, coalesce_opcodes
+from idlereload.history import ReloadCommand
+from idlereload.ingest import read_file
+from idlereload.snapshot import Snapshot, intern_hashes, line_hash
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from idlereload.diff import Opcode
+
+_THREAD_POOL: ThreadPoolExecutor | None = None
+# Run with python -c, never with multiprocessing, which would run the
+# __main__ of IDLE again. Reads pickled arguments of compute_reload_plan,
+# writes pickled (True, plan) or (False, exception).
+PLAN_SOURCE = """
+import json, pickle, sys
+
+sys.path[:0] = json.loads(sys.argv[1])
+from idlereload.worker import compute_reload_plan
+
+arguments = pickle.load(sys.stdin.buffer)
+try:
+    result = (True, compute_reload_plan(*arguments))
+except Exception as exc:
+    result = (False, exc)
+pickle.dump(result, sys.stdout.buffer)
+"""
+
+
+class ReloadPlan(NamedTuple):
+    """Everything the Tk thread needs to apply a reload."""
+
+    digest: bytes
+    new_lines: Sequence[str]
+    opcodes: list[Opcode]
+    edits: list[Edit]
+    record: ReloadCommand
+    snapshot: Snapshot
+    # Engine name or fallback used for the diff
+    strategy: str
+    # Seconds taken by each phase in the worker
+    timings: dict[str, float]
+    size: int
+
+
+def hash_file(filename: str, chunk_size: int = 1 << 16) -> bytes | None:
+    """Return content fingerprint digest of file or None on OSError.
+
+    File is read in chunks, so digest matches ingest.hash_bytes of the
+    whole file without ever holding it in memory.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        with open(filename, "rb") as fp:
+            while chunk := fp.read(chunk_size):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.digest()
+
+
+def compute_reload_plan(
+    filename: str,
+    encoding: str,
+    source: list[str] | Snapshot,
+    engine_name: str,
+    granularity: str = "line",
+    max_cost: int = 0,
+    budget: float = 0.0,
+    max_size: int = 0,
+) -> ReloadPlan:
+    """Read, decode and diff file against source lines or snapshot.
+
+    Lines are diffed as interned integer ids of their hashes, text of
+    a snapshot is only decompressed if anything changed. Diff falls back
+    to one block replace over max_cost or budget seconds, see
+    budgeted_opcodes. Files over max_size bytes raise FileTooLargeError.
+    Does not touch Tk, so it is safe to run in a worker thread or process.
+    """
+    timings: dict[str, float] = {}
+    start = time.perf_counter()
+    digest, new_lines, size = read_file(filename, encoding, max_size)
+    timings["read"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    snapshot = Snapshot.from_lines(new_lines, digest)
+    if isinstance(source, Snapshot):
+        source_hashes = source.hashes
+    else:
+        source_hashes = array("Q", map(line_hash, source))
+    source_ids, new_ids = intern_hashes(source_hashes, snapshot.hashes)
+    timings["hash"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    opcodes, strategy = budgeted_opcodes(
+        engine_name,
+        source_ids,
+        new_ids,
+        max_cost,
+        budget,
+    )
+    timings["diff"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    changes = coalesce_opcodes(opcodes)
+
+    if not isinstance(source, Snapshot):
+        source_lines = source
+    elif changes:
+        source_lines = source.lines()
+    else:
+        # Without changes, no source line is ever looked at
+        source_lines = []
+    edits = build_edits(
+        changes,
+        len(source_hashes),
+        new_lines,
+        source_lines,
+        granularity,
+    )
+    record = ReloadCommand(changes, source_lines, new_lines)
+    timings["edits"] = time.perf_counter() - start
+    return ReloadPlan(
+        digest,
+        new_lines,
+        opcodes,
+        edits,
+        record,
+        snapshot,
+        strategy,
+        timings,
+        size,
+    )
+
+
+def snapshot_file(filename: str, encoding: str, max_size: int = 0) -> Snapshot:
+    """Return snapshot of file, read and decoded like reloads read it.
+
+    Does not touch Tk. Raise FileTooLargeError if file is bigger than
+    max_size bytes, unless max_size is zero.
+    """
+    digest, lines, _ = read_file(filename, encoding, max_size)
+    return Snapshot.from_lines(lines, digest)
+
+
+def compute_in_subprocess(
+    filename: str,
+    encoding: str,
+    source: list[str] | Snapshot,
+    engine_name: str,
+    granularity: str = "line",
+    max_cost: int = 0,
+    budget: float = 0.0,
+    max_size: int = 0,
+) -> ReloadPlan:
+    """Return compute_reload_plan result, computed in a new interpreter.
+
+    Avoids holding the GIL away from Tk for huge inputs, but costs
+    starting python and pickling both sides of the diff. Errors of
+    compute_reload_plan are raised again here.
+    """
+    arguments = (
+        filename,
+        encoding,
+        source,
+        engine_name,
+        granularity,
+        max_cost,
+        budget,
+        max_size,
+    )
+    process = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", PLAN_SOURCE, json.dumps(sys.path)],
+        input=pickle.dumps(arguments, pickle.HIGHEST_PROTOCOL),
+        capture_output=True,
+        check=False,
+    )
+    if process.returncode:
+        raise RuntimeError(
+            "Reload subprocess failed:\n"
+            + process.stderr.decode("utf-8", "replace"),
+        )
+    succeeded, result = pickle.loads(process.stdout)  # noqa: S301
+    if not succeeded:
+        raise result
+    plan: ReloadPlan = result
+    return plan
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return shared thread pool, creating it on first use."""
+    global _THREAD_POOL
+    if _THREAD_POOL is None:
+        _THREAD_POOL = ThreadPoolExecutor(
+            max_workers=2,
+            thread_name_prefix=__name__,
+        )
+    return _THREAD_POOL
+
+
+def submit_reload_plan(
+    filename: str,
+    encoding: str,
+    source: list[str] | Snapshot,
+    engine_name: str,
+    granularity: str = "line",
+    max_cost: int = 0,
+    budget: float = 0.0,
+    max_size: int = 0,
+    use_process: bool = False,
+) -> Future[ReloadPlan]:
+    """Start computing reload plan in the background, return its future.
+
+    If use_process, a worker thread waits for a subprocess doing the
+    work instead, see compute_in_subprocess.
+    """
+    return get_executor().submit(
+        compute_in_subprocess if use_process else compute_reload_plan,
+        filename,
+        encoding,
+        source,
+        engine_name,
+        granularity,
+        max_cost,
+        budget,
+        max_size,
+    )
+
+
+def submit_snapshot(
+    filename: str,
+    encoding: str,
+    max_size: int = 0,
+) -> Future[Snapshot]:
+    """Start taking snapshot of file in a worker thread, return its future."""
+    return get_executor().submit(snapshot_file, filename, encoding, max_size)
@@ -0,0 +1,373 @@
+from __future__ import annotations
+
+import operator
+import re
+from idlelib.delegator import Delegator
+from idlelib.undo import UndoDelegator
+from typing import TYPE_CHECKING, Any, Protocol
+
+import pytest
+
+import idlereload
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+    from idlereload.worker import ReloadPlan
+
+# base index, then optional +Nc or -Nc
+INDEX = re.compile(r"(.*?)(?:([+-])(\d+)c)?")
+COMPARE: dict[str, Callable[[tuple[int, int], tuple[int, int]], bool]] = {
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    ">=": operator.ge,
+    ">": operator.gt,
+    "!=": operator.ne,
+}
+
+
+class MakeWindow(Protocol):
+    """Type of the make_window fixture."""
+
+    def __call__(
+        self,
+        old: list[str],
+        new: list[str],
+        newline: str = "\n",
+        encoding: str = "utf-8",
+    ) -> tuple[FakeEditorWindow, idlereload.idlereload]:
+        """Return window showing old lines, with new lines on disk."""
+
+
+class FakeText:
+    """In memory stand-in for tkinter.Text, one str per line.
+
+    Understands line.column, line.end, end, end-1c and marks, which is
+    every index form reloading uses.
+    """
+
+    def __init__(self, content: str = "") -> None:
+        """Initialize with content."""
+        self.lines = content.split("\n")
+        self.marks: dict[str, tuple[int, int]] = {"insert": (1, 0)}
+        self.idle: list[tuple[Callable[..., object], tuple[object, ...]]] = []
+        self.bells = 0
+        self.bindings: dict[str, Callable[[object], object]] = {}
+        self.percolator = FakePercolator(self)
+
+    def parse(self, index: str) -> tuple[int, int]:
+        """Return (line, column) of index, clamped like Tk does."""
+        if index in {"end", "end-1c"}:
+            return len(self.lines), len(self.lines[-1])
+        match = INDEX.fullmatch(index)
+        assert match is not None
+        base, sign, count = match.groups()
+        if base in self.marks:
+            line, column = self.marks[base]
+        else:
+            line_text, column_text = base.split(".")
+            line = min(max(int(line_text), 1), len(self.lines))
+            column = len(self.lines[line - 1])
+            if column_text != "end":
+                column = min(int(column_text), column)
+        if sign:
+            line, column = self.move(line, column, int(sign + count))
+        return line, column
+
+    def move(self, line: int, column: int, count: int) -> tuple[int, int]:
+        """Return position count characters away, newlines included."""
+        while count > 0:
+            remaining = len(self.lines[line - 1]) - column
+            if count <= remaining or line == len(self.lines):
+                return line, min(column + count, column + remaining)
+            count -= remaining + 1
+            line += 1
+            column = 0
+        while count < 0:
+            if -count <= column or line == 1:
+                return line, max(column + count, 0)
+            count += column + 1
+            line -= 1
+            column = len(self.lines[line - 1])
+        return line, column
+
+    def compare(self, index1: str, op: str, index2: str) -> bool:
+        """Return result of comparing positions of indexes with op."""
+        return COMPARE[op](self.parse(index1), self.parse(index2))
+
+    def index(self, index: str) -> str:
+        """Return index as line.column."""
+        line, column = self.parse(index)
+        return f"{line}.{column}"
+
+    def get(self, start: str, end: str | None = None) -> str:
+        """Return text between indexes."""
+        start_line, start_column = self.parse(start)
+        if end is None:
+            return self.get(start, f"{start_line}.{start_column + 1}")
+        end_line, end_column = self.parse(end)
+        if start_line == end_line:
+            return self.lines[start_line - 1][start_column:end_column]
+        return "\n".join(
+            [
+                self.lines[start_line - 1][start_column:],
+                *self.lines[start_line : end_line - 1],
+                self.lines[end_line - 1][:end_column],
+            ],
+        )
+
+    def insert(self, index: str, chars: str, tags: object = None) -> None:
+        """Insert chars through the filters of the percolator."""
+        self.percolator.top.insert(index, chars, tags)
+
+    def delete(self, start: str, end: str | None = None) -> None:
+        """Delete text through the filters of the percolator."""
+        self.percolator.top.delete(start, end)
+
+    def raw_insert(self, index: str, chars: str, tags: object = None) -> None:
+        """Insert chars at index."""
+        line, column = self.parse(index)
+        current = self.lines[line - 1]
+        new = (current[:column] + chars + current[column:]).split("\n")
+        self.lines[line - 1 : line] = new
+
+    def raw_delete(self, start: str, end: str | None = None) -> None:
+        """Delete text between indexes."""
+        start_line, start_column = self.parse(start)
+        if end is None:
+            end_line, end_column = start_line, start_column + 1
+        else:
+            end_line, end_column = self.parse(end)
+        joined = (
+            self.lines[start_line - 1][:start_column]
+            + self.lines[end_line - 1][end_column:]
+        )
+        self.lines[start_line - 1 : end_line] = [joined]
+
+    def mark_set(self, name: str, index: str) -> None:
+        """Set mark to index."""
+        self.marks[name] = self.parse(index)
+
+    def mark_names(self) -> tuple[str, ...]:
+        """Return names of marks."""
+        return tuple(self.marks)
+
+    def see(self, index: str) -> None:
+        """Do nothing, there is nothing to scroll."""
+
+    def bell(self) -> None:
+        """Count bells instead of ringing them."""
+        self.bells += 1
+
+    def bind(
+        self,
+        sequence: str,
+        func: Callable[[object], object],
+        add: object = None,
+    ) -> str:
+        """Remember func as the only handler of sequence."""
+        self.bindings[sequence] = func
+        return sequence
+
+    def unbind(self, sequence: str, funcid: str | None = None) -> None:
+        """Forget handler of sequence."""
+        self.bindings.pop(sequence, None)
+
+    def event_generate(self, sequence: str) -> object:
+        """Call handler of sequence, return what it returned."""
+        return self.bindings[sequence](None)
+
+    def after(
+        self,
+        ms: int,
+        func: Callable[..., object],
+        *args: object,
+    ) -> str:
+        """Queue func, time is ignored."""
+        self.idle.append((func, args))
+        return "after"
+
+    def after_idle(self, func: Callable[..., object], *args: object) -> str:
+        """Queue func."""
+        return self.after(0, func, *args)
+
+    def run_idle(self) -> None:
+        """Run queued callbacks until none are left."""
+        while self.idle:
+            func, args = self.idle.pop(0)
+            func(*args)
+
+    def run_one(self) -> None:
+        """Run oldest queued callback."""
+        func, args = self.idle.pop(0)
+        func(*args)
+
+
+class FakeBottom(Delegator):
+    """Bottom of the filter chain, editing the fake widget."""
+
+    def __init__(self, text: FakeText) -> None:
+        """Initialize editing text."""
+        super().__init__(text)
+        self.text = text
+
+    def insert(self, index: str, chars: str, tags: object = None) -> None:
+        """Insert chars at index."""
+        self.text.raw_insert(index, chars, tags)
+
+    def delete(self, start: str, end: str | None = None) -> None:
+        """Delete text between indexes."""
+        self.text.raw_delete(start, end)
+
+
+class FakePercolator:
+    """Percolator redirecting edits of the fake widget through filters."""
+
+    def __init__(self, text: FakeText) -> None:
+        """Initialize with only the widget at the bottom."""
+        # Filters are duck typed, like idlelib does
+        self.bottom = FakeBottom(text)
+        self.top: Any = self.bottom
+
+    def insertfilter(self, delegator: Any) -> None:
+        """Put filter on top."""
+        delegator.setdelegate(self.top)
+        self.top = delegator
+
+    def removefilter(self, delegator: Any) -> None:
+        """Take filter out of the chain."""
+        if self.top is delegator:
+            self.top = delegator.delegate
+        else:
+            above = self.top
+            while above.delegate is not delegator:
+                above.resetcache()
+                above = above.delegate
+            above.setdelegate(delegator.delegate)
+        delegator.setdelegate(None)
+
+    def filters(self) -> list[object]:
+        """Return filters from the top down."""
+        result: list[object] = []
+        current = self.top
+        while current is not self.bottom:
+            result.append(current)
+            current = current.delegate
+        return result
+
+
+class FakeIOBinding:
+    """IOBinding holding a filename and encoding."""
+
+    def __init__(
+        self,
+        editwin: FakeEditorWindow,
+        filename: str,
+        encoding: str,
+    ) -> None:
+        """Initialize with window whose undo delegator tracks saved state."""
+        self.editwin = editwin
+        self.filename: str | None = filename
+        self.fileencoding = encoding
+
+    def get_saved(self) -> bool:
+        """Return if buffer is saved."""
+        return bool(self.editwin.undo.get_saved())
+
+    def set_saved(self, flag: bool) -> None:
+        """Set if buffer is saved."""
+        self.editwin.undo.set_saved(flag)
+
+    def writefile(self, filename: str) -> bool:
+        """Refuse to write, saving is not tested here."""
+        return False
+
+
+class FakeEditorWindow:
+    """Just enough of an EditorWindow for reloading files."""
+
+    def __init__(self, content: str, filename: str, encoding: str) -> None:
+        """Initialize window showing content loaded from filename."""
+        self.text = FakeText(content)
+        self.per = self.text.percolator
+        self.undo = UndoDelegator()
+        self.per.insertfilter(self.undo)
+        self.io = FakeIOBinding(self, filename, encoding)
+        self.color: object = None
+        self.extensions: dict[str, object] = {}
+        self.status_bar = self
+        self.flist = self
+        self.pyshell = None
+        self.inversedict: dict[FakeEditorWindow, object] = {}
+        self.status = ""
+
+    def set_label(self, name: str, text: str = "", side: str = "") -> None:
+        """Remember status bar text."""
+        self.status = text
+
+    def short_title(self) -> str:
+        """Return name of file."""
+        return self.io.filename or ""
+
+    def getlineno(self) -> int:
+        """Return line of insert cursor."""
+        return self.text.parse("insert")[0]
+
+    def gotoline(self, line: int) -> None:
+        """Move insert cursor to line."""
+        self.text.mark_set("insert", f"{line}.0")
+
+    def type_text(self, index: str, chars: str) -> None:
+        """Insert chars into the widget, like typing does."""
+        self.text.insert(index, chars)
+
+
+@pytest.fixture
+def settings(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Use defaults regardless of the user configuration."""
+    for key, default in idlereload.idlereload.values.items():
+        if hasattr(idlereload.idlereload, key):
+            monkeypatch.setattr(idlereload.idlereload, key, default)
+    monkeypatch.setattr(idlereload.idlereload, "background_diff", "False")
+    monkeypatch.setattr(idlereload, "debug", lambda *args: None)
+
+
+@pytest.fixture
+def plans(monkeypatch: pytest.MonkeyPatch) -> list[ReloadPlan]:
+    """Return list every reload plan applied is added to."""
+    applied: list[ReloadPlan] = []
+    apply_reload_plan = idlereload.idlereload.apply_reload_plan
+
+    def spy(
+        self: idlereload.idlereload,
+        filename: str,
+        plan: ReloadPlan,
+    ) -> None:
+        applied.append(plan)
+        apply_reload_plan(self, filename, plan)
+
+    monkeypatch.setattr(idlereload.idlereload, "apply_reload_plan", spy)
+    return applied
+
+
+@pytest.fixture
+def make_window(tmp_path: Path) -> MakeWindow:
+    """Return function building window and extension on a temporary file."""
+
+    def make(
+        old: list[str],
+        new: list[str],
+        newline: str = "\n",
+        encoding: str = "utf-8",
+    ) -> tuple[FakeEditorWindow, idlereload.idlereload]:
+        path = tmp_path / "module.py"
+        path.write_bytes(newline.join(old).encode(encoding))
+        editwin = FakeEditorWindow("\n".join(old), str(path), encoding)
+        extension = idlereload.idlereload(editwin)  # type: ignore[arg-type]
+        editwin.text.run_idle()
+        path.write_bytes(newline.join(new).encode(encoding))
+        return editwin, extension
+
+    return make
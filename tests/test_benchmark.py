@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import difflib
+import json
+import os
+import random
+import time
+import tracemalloc
+from concurrent.futures import wait
+from pathlib import Path
+from typing import TYPE_CHECKING, TypeAlias
+
+import pytest
+
+import idlereload
+from idlereload.snapshot import Snapshot
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from conftest import FakeEditorWindow, MakeWindow
+
+    from idlereload.worker import ReloadPlan
+
+BASELINES_PATH = Path(__file__).with_name("benchmark_baselines.json")
+# Set to rewrite baselines from this machine, with headroom
+UPDATE_BASELINES = os.environ.get("IDLERELOAD_UPDATE_BASELINES") == "1"
+# Times are stored relative to the calibration fixture, so they carry
+# over between machines, but still vary more than memory does
+TIME_HEADROOM = 5
+MEMORY_HEADROOM = 2
+# Best of this many runs is timed
+REPEAT = 3
+
+
+def python_source(functions: int, seed: int) -> list[str]:
+    """Return lines of a synthetic module with given number of functions."""
+    generator = random.Random(seed)  # noqa: S311
+    lines = ['"""Generated module."""', ""]
+    for index in range(functions):
+        value = generator.randrange(1 << 30)
+        lines.extend(
+            (
+                "",
+                f"def function_{index}(value: int) -> int:",
+                f'    """Return value mixed with {value}."""',
+                f"    result = value * {value} + {index}",
+                "    for step in range(3):",
+                "        result ^= result >> step",
+                "    return result",
+            ),
+        )
+    return [*lines, ""]
+
+
+def small_edit(lines: list[str]) -> list[str]:
+    """Change a few lines in the middle of a big file."""
+    new = list(lines)
+    for index in (len(new) // 4, len(new) // 2, 3 * len(new) // 4):
+        new[index] += "  # edited"
+    return new
+
+
+def full_rewrite(lines: list[str]) -> list[str]:
+    """Change every line."""
+    return [line.replace("result", "output") + " " for line in lines]
+
+
+def reorder(lines: list[str]) -> list[str]:
+    """Shuffle whole functions, like a formatter sorting them."""
+    header, body = lines[:2], lines[2:-1]
+    functions = [body[index : index + 7] for index in range(0, len(body), 7)]
+    random.Random(1).shuffle(functions)  # noqa: S311
+    return [*header, *(line for block in functions for line in block), ""]
+
+
+# name -> (functions, change, newline, encoding)
+Workload: TypeAlias = tuple[int, "Callable[[list[str]], list[str]]", str, str]
+WORKLOADS: dict[str, Workload] = {
+    "small_edit_huge_file": (8000, small_edit, "\n", "utf-8"),
+    "full_rewrite": (1000, full_rewrite, "\n", "utf-8"),
+    "reorder": (1000, reorder, "\n", "utf-8"),
+    "crlf": (1000, small_edit, "\r\n", "utf-8"),
+    "latin_1": (1000, small_edit, "\n", "latin-1"),
+    "utf_8_bom": (1000, small_edit, "\n", "utf-8-sig"),
+}
+# Every line changed, one replace is the best edit there is
+BLOCK_EXPECTED = {"full_rewrite"}
+
+
+@pytest.fixture(scope="module")
+def calibration() -> float:
+    """Return seconds a fixed amount of diffing takes on this machine."""
+    old = python_source(1000, 0)
+    new = small_edit(old)
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        difflib.SequenceMatcher(None, old, new).get_opcodes()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def load_baselines() -> dict[str, dict[str, float]]:
+    """Return stored baselines."""
+    if not BASELINES_PATH.exists():
+        return {}
+    baselines: dict[str, dict[str, float]] = json.loads(
+        BASELINES_PATH.read_text(encoding="utf-8"),
+    )
+    return baselines
+
+
+def save_baseline(name: str, relative: float, peak: int, edits: int) -> None:
+    """Store measurements of workload with headroom."""
+    baselines = load_baselines()
+    baselines[name] = {
+        "relative": round(relative * TIME_HEADROOM, 1),
+        "peak_kb": peak * MEMORY_HEADROOM // 1024,
+        "edits": edits,
+    }
+    BASELINES_PATH.write_text(
+        json.dumps(baselines, indent=4, sort_keys=True) + "\n",
+        encoding="utf-8",
+    )
+
+
+def reload_window(
+    editwin: FakeEditorWindow,
+    extension: idlereload.idlereload,
+) -> None:
+    """Reload file of window and run everything it scheduled."""
+    filename = editwin.io.filename
+    assert filename is not None
+    extension.reload_file_contents(filename)
+    editwin.text.run_idle()
+
+
+@pytest.mark.usefixtures("settings")
+@pytest.mark.parametrize("name", WORKLOADS)
+def test_reload_workload(
+    name: str,
+    make_window: MakeWindow,
+    plans: list[ReloadPlan],
+    calibration: float,
+) -> None:
+    functions, change, newline, encoding = WORKLOADS[name]
+    old = python_source(functions, 0)
+    new = change(old)
+
+    seconds = float("inf")
+    for _ in range(REPEAT):
+        editwin, extension = make_window(old, new, newline, encoding)
+        start = time.perf_counter()
+        reload_window(editwin, extension)
+        seconds = min(seconds, time.perf_counter() - start)
+
+    assert editwin.text.get("1.0", "end-1c") == "\n".join(new)
+    assert editwin.io.get_saved()
+    editwin.undo.undo_event(None)
+    assert editwin.text.get("1.0", "end-1c") == "\n".join(old)
+    editwin.undo.redo_event(None)
+    assert editwin.text.get("1.0", "end-1c") == "\n".join(new)
+    plan = plans[-1]
+    # Running out of budget would turn the reload into one big replace
+    assert plan.strategy != "block (timeout)"
+    if name not in BLOCK_EXPECTED:
+        assert not plan.strategy.startswith("block"), plan.strategy
+
+    # Separate run, tracing allocations slows everything down
+    editwin, extension = make_window(old, new, newline, encoding)
+    tracemalloc.start()
+    try:
+        reload_window(editwin, extension)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    relative = seconds / calibration
+    if UPDATE_BASELINES:
+        save_baseline(name, relative, peak, len(plan.edits))
+        return
+    baseline = load_baselines().get(name)
+    if baseline is None:
+        pytest.skip(f"No baseline for {name}")
+    assert len(plan.edits) <= baseline["edits"], f"{name} made more edits"
+    assert relative <= baseline["relative"], (
+        f"{name} took {seconds:.3f} s, {relative:.1f} times calibration"
+    )
+    assert peak // 1024 <= baseline["peak_kb"], f"{name} peaked at {peak} B"
+
+
+@pytest.mark.usefixtures("settings")
+def test_reload_progressive(
+    monkeypatch: pytest.MonkeyPatch,
+    make_window: MakeWindow,
+) -> None:
+    monkeypatch.setattr(
+        idlereload.idlereload,
+        "progressive_threshold_lines",
+        "10",
+    )
+    monkeypatch.setattr(idlereload.idlereload, "slice_ms", "1")
+    old = python_source(200, 0)
+    new = full_rewrite(old)
+    editwin, extension = make_window(old, new)
+    assert editwin.io.filename is not None
+    extension.reload_file_contents(editwin.io.filename)
+    started = extension.applying
+    assert started is not None
+    editwin.text.run_idle()
+    assert extension.applying is None
+    assert editwin.text.get("1.0", "end-1c") == "\n".join(new)
+
+
+@pytest.mark.usefixtures("settings")
+def test_reload_background_and_snapshot(
+    monkeypatch: pytest.MonkeyPatch,
+    make_window: MakeWindow,
+) -> None:
+    monkeypatch.setattr(idlereload.idlereload, "background_diff", "True")
+    old = python_source(200, 0)
+    new = small_edit(old)
+    editwin, extension = make_window(old, new)
+    assert editwin.io.filename is not None
+    for content in (new, reorder(new)):
+        Path(editwin.io.filename).write_text("\n".join(content))
+        extension.reload_file_contents(editwin.io.filename)
+        assert extension.pending is not None
+        wait([extension.pending[0]])
+        editwin.text.run_idle()
+        assert editwin.text.get("1.0", "end-1c") == "\n".join(content)
+    # Second reload was diffed against the snapshot of the first
+    assert isinstance(extension.source_lines(), Snapshot)
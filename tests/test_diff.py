@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import random
+from itertools import pairwise
+from typing import TYPE_CHECKING
+
+import pytest
+
+from idlereload import diff
+
+if TYPE_CHECKING:
+    from collections.abc import Hashable, Sequence
+
+
+def apply_opcodes(
+    a: Sequence[Hashable],
+    b: Sequence[Hashable],
+    opcodes: list[diff.Opcode],
+) -> list[Hashable]:
+    result: list[Hashable] = []
+    a_index = b_index = 0
+    for tag, a_low, a_high, b_low, b_high in opcodes:
+        assert (a_low, b_low) == (a_index, b_index)
+        if tag == "equal":
+            assert list(a[a_low:a_high]) == list(b[b_low:b_high])
+            result.extend(a[a_low:a_high])
+        else:
+            result.extend(b[b_low:b_high])
+        a_index, b_index = a_high, b_high
+    assert (a_index, b_index) == (len(a), len(b))
+    return result
+
+
+@pytest.mark.parametrize("name", sorted(diff.DIFF_ENGINES))
+def test_engines_reconstruct(name: str) -> None:
+    engine = diff.DIFF_ENGINES[name]
+    rng = random.Random(name)  # noqa: S311
+    for _ in range(300):
+        a = [rng.randint(0, 5) for _ in range(rng.randint(0, 25))]
+        b = [rng.randint(0, 5) for _ in range(rng.randint(0, 25))]
+        opcodes = engine(a, b)
+        assert apply_opcodes(a, b, opcodes) == b
+        for first, second in pairwise(opcodes):
+            assert "equal" in {first[0], second[0]}
+
+
+def test_myers_is_minimal() -> None:
+    a = list("abcabba")
+    b = list("cbabac")
+    opcodes = diff.myers_opcodes(a, b)
+    assert (
+        sum(high - low for tag, low, high, _, _ in opcodes if tag == "equal")
+        == 4
+    )
+
+
+def test_engines_same_tags_as_difflib() -> None:
+    a = ["def x():", "    return 1", "", "y = 2"]
+    b = ["def x():", "    return 2", "", "y = 2", "z = 3"]
+    expected = diff.difflib_opcodes(a, b)
+    assert diff.myers_opcodes(a, b) == expected
+    assert diff.patience_opcodes(a, b) == expected
+
+
+def test_estimate_cost_ignores_common_ends() -> None:
+    a = list("abcXdef")
+    b = list("abcYYdef")
+    assert diff.estimate_cost(a, b) == 3 * 3
+    assert diff.estimate_cost(a, a) == 0
+
+
+def test_estimate_cost_counts_reordered_for_myers() -> None:
+    blocks = [
+        [f"def f{index}():", f"    return {index}"] for index in range(6)
+    ]
+    a = [line for block in blocks for line in block]
+    b = [line for block in reversed(blocks) for line in block]
+    assert diff.reordered_items(a, b) == 10
+    assert diff.estimate_cost(a, b, "patience") == 24
+    assert diff.estimate_cost(a, b, "myers") == 24 * 20
+
+
+def test_budgeted_opcodes_routes_reorders_to_patience() -> None:
+    blocks = [
+        [f"def f{index}():", "    x = 1", f"    return {index}", ""]
+        for index in range(300)
+    ]
+    a = [line for block in blocks for line in block]
+    b = [line for block in reversed(blocks) for line in block]
+    opcodes, strategy = diff.budgeted_opcodes("myers", a, b, max_cost=10**6)
+    assert strategy == "patience (reorder)"
+    assert opcodes == diff.patience_opcodes(a, b)
+    assert apply_opcodes(a, b, opcodes) == b
+
+
+def test_budgeted_opcodes_falls_back_to_block() -> None:
+    a = list("abcXdef")
+    b = list("abcYYdef")
+    block = [
+        ("equal", 0, 3, 0, 3),
+        ("replace", 3, 4, 3, 5),
+        ("equal", 4, 7, 5, 8),
+    ]
+    assert diff.block_opcodes(a, b) == block
+    assert diff.budgeted_opcodes("myers", a, b, max_cost=1) == (
+        block,
+        "block (estimate)",
+    )
+    rng = random.Random(5)  # noqa: S311
+    big_a = [rng.randrange(50) for _ in range(3000)]
+    big_b = [rng.randrange(50) for _ in range(3000)]
+    opcodes, strategy = diff.budgeted_opcodes(
+        "myers",
+        big_a,
+        big_b,
+        budget=1e-9,
+    )
+    assert strategy == "block (timeout)"
+    assert opcodes == diff.block_opcodes(big_a, big_b)
+    assert diff.budgeted_opcodes("myers", a, b) == (
+        diff.myers_opcodes(a, b),
+        "myers",
+    )
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from idlereload import edits
+
+
+def test_split_lines_matches_tk_lines() -> None:
+    assert edits.split_lines("a\r\nb\rc\x0cd\n") == ["a", "b", "c\x0cd", ""]
+
+
+def test_coalesce_opcodes() -> None:
+    opcodes = [
+        ("equal", 0, 2, 0, 2),
+        ("delete", 2, 3, 2, 2),
+        ("insert", 3, 3, 2, 4),
+        ("equal", 3, 5, 4, 6),
+    ]
+    assert edits.coalesce_opcodes(opcodes) == [("replace", 2, 3, 2, 4)]
+
+
+def test_build_edits_only_builds_inserted_text() -> None:
+    source = edits.split_lines("a\nb\nc\n")
+    new = edits.split_lines("a\nB\nB2\nc\n")
+    opcodes = [
+        ("equal", 0, 1, 0, 1),
+        ("replace", 1, 2, 1, 3),
+        ("equal", 2, 4, 3, 5),
+    ]
+    assert edits.build_edits(opcodes, len(source), new) == [
+        edits.Edit("2.0", "3.0", "B\nB2\n"),
+    ]
+
+
+def test_build_edits_end_of_document() -> None:
+    source = edits.split_lines("a\nb")
+    new = edits.split_lines("a")
+    opcodes = [("equal", 0, 1, 0, 1), ("delete", 1, 2, 1, 1)]
+    assert edits.build_edits(opcodes, len(source), new) == [
+        edits.Edit("1.end", "end-1c", ""),
+    ]
+
+
+def test_map_line() -> None:
+    opcodes = [
+        ("equal", 0, 2, 0, 2),
+        ("insert", 2, 2, 2, 5),
+        ("equal", 2, 4, 5, 7),
+    ]
+    assert edits.map_line(opcodes, 1) == 1
+    assert edits.map_line(opcodes, 3) == 6
+    assert edits.map_line(opcodes, 10) == 10
+
+
+def test_refine_line_word() -> None:
+    assert edits.refine_line(3, "x = foo(a, b)", "x = bar(a, c)", "word") == [
+        edits.Edit("3.4", "3.7", "bar"),
+        edits.Edit("3.11", "3.12", "c"),
+    ]
+    assert edits.refine_line(1, "value = 1", "value = 12", "line") == [
+        edits.Edit("1.9", "1.9", "2"),
+    ]
+
+
+def test_build_edits_refined_matches_lines() -> None:
+    source = edits.split_lines("def f(a):\n    return a + 1\nend")
+    new = edits.split_lines("def g(a):\n    return a * 2\nend!")
+    opcodes = [("replace", 0, 3, 0, 3)]
+    refined = edits.build_edits(opcodes, len(source), new, source, "word")
+    assert refined == [
+        edits.Edit("1.4", "1.5", "g"),
+        edits.Edit("2.13", "2.14", "*"),
+        edits.Edit("2.15", "2.16", "2"),
+        edits.Edit("3.3", "3.3", "!"),
+    ]
+
+
+def test_changed_ranges_merges_neighbours() -> None:
+    opcodes = [
+        ("replace", 0, 1, 0, 1),
+        ("insert", 1, 1, 1, 3),
+        ("equal", 1, 5, 3, 7),
+        ("delete", 5, 7, 7, 7),
+        ("equal", 7, 8, 7, 8),
+    ]
+    assert edits.changed_ranges(opcodes) == [(0, 3), (7, 8)]
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import os
+import sys
+from typing import TYPE_CHECKING
+
+from idlereload import extensions
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+
+
+def test_find_imports_resolves_relative() -> None:
+    source = "import os\nfrom . import sub\nfrom ..other import thing\n"
+    assert extensions.find_imports(source, "pkg.inner.mod", False) == {
+        "os",
+        "pkg.inner",
+        "pkg.inner.sub",
+        "pkg.other",
+        "pkg.other.thing",
+    }
+
+
+def test_reload_order_dependencies_first() -> None:
+    graph = {"a": {"b"}, "b": {"c"}, "c": set(), "d": {"a"}}
+    assert extensions.dependents({"b"}, graph) == {"a", "b", "d"}
+    assert extensions.reload_order({"a", "b", "d"}, graph) == ["b", "a", "d"]
+
+
+def test_reload_changed_only_reloads_changed(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    package = tmp_path / "reloadpkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("from . import uses\n")
+    (package / "uses.py").write_text("from .base import VALUE\n")
+    (package / "base.py").write_text("VALUE = 1\n")
+    (package / "alone.py").write_text("OTHER = 1\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(sys, "dont_write_bytecode", True)
+    try:
+        importlib.import_module("reloadpkg.alone")
+        uses = importlib.import_module("reloadpkg.uses")
+        extensions.remember_modules(["reloadpkg"])
+        assert extensions.reload_changed(["reloadpkg"]) == []
+
+        (package / "base.py").write_text("VALUE = 200\n")
+        assert extensions.reload_changed(["reloadpkg"]) == [
+            "reloadpkg.base",
+            "reloadpkg.uses",
+            "reloadpkg",
+        ]
+        assert uses.VALUE == 200
+    finally:
+        for name in tuple(sys.modules):
+            if name.split(".")[0] == "reloadpkg":
+                del sys.modules[name]
+
+
+def test_precompile_reports_syntax_errors(tmp_path: Path) -> None:
+    good = tmp_path / "good.py"
+    good.write_text("VALUE = 1\n")
+    bad = tmp_path / "bad.py"
+    bad.write_text("def broken(:\n")
+    errors = extensions.precompile([str(good), str(bad)])
+    assert list(errors) == [str(bad)]
+    assert "SyntaxError" in errors[str(bad)]
+    assert os.path.exists(importlib.util.cache_from_source(str(good)))
+
+
+def test_precompile_many_in_subprocesses(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    monkeypatch.setattr(extensions, "PROCESS_COMPILE_THRESHOLD", 2)
+    goods = [tmp_path / f"good_{index}.py" for index in range(3)]
+    for good in goods:
+        good.write_text("VALUE = 1\n")
+    bad = tmp_path / "bad.py"
+    bad.write_text("def broken(:\n")
+    filenames = [str(goods[0]), str(bad), *map(str, goods[1:])]
+    errors = extensions.precompile(filenames)
+    assert list(errors) == [str(bad)]
+    assert "SyntaxError" in errors[str(bad)]
+    for good in goods:
+        assert os.path.exists(importlib.util.cache_from_source(str(good)))
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from idlereload import handlers
+
+if TYPE_CHECKING:
+    import pytest
+
+
+def test_timed_handler_records_and_flags(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(handlers, "_TIMINGS", {})
+    slow: list[tuple[str, str]] = []
+
+    def handler(event: object = None) -> str:
+        return "break"
+
+    fast = handlers.timed_handler(
+        "Fast",
+        "fast_event",
+        handler,
+        1.0,
+        lambda extension, name, _: slow.append((extension, name)),
+    )
+    flagged = handlers.timed_handler(
+        "Slow",
+        "slow_event",
+        handler,
+        -1.0,
+        lambda extension, name, _: slow.append((extension, name)),
+    )
+    assert fast(None) == "break"
+    assert fast() == "break"
+    assert flagged(None) == "break"
+    assert slow == [("Slow", "slow_event")]
+    assert handlers._TIMINGS["Fast", "fast_event"].calls == 2
+    assert handlers._TIMINGS["Slow", "slow_event"].slow == 1
+
+    report = handlers.handler_report("calls")
+    assert report.index("Fast") < report.index("Slow")
+    assert "fast_event" in report
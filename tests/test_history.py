@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from idlelib.undo import UndoDelegator
+
+from idlereload import edits, history
+from idlereload.diff import myers_opcodes
+
+
+def test_compress_lines_round_trip() -> None:
+    lines = ["a", "", "b\udc80"]
+    data = history.compress_lines(lines)
+    assert history.decompress_lines(data, 3) == lines
+    assert history.decompress_lines(history.compress_lines([]), 0) == []
+
+
+def test_reload_command_edits_invert() -> None:
+    old = edits.split_lines("a\nb\nc\nd")
+    new = edits.split_lines("a\nB\nc\nd\ne")
+    changes = edits.coalesce_opcodes(myers_opcodes(old, new))
+    command = history.ReloadCommand(changes, old, new)
+    assert command.edits(False) == edits.build_edits(changes, len(old), new)
+    assert command.edits(True) == [
+        edits.Edit("2.0", "3.0", "b\n"),
+        edits.Edit("4.end", "end-1c", ""),
+    ]
+
+
+def test_trim_undo_drops_oldest() -> None:
+    undo = UndoDelegator()
+    old = [f"line {index}" for index in range(200)]
+    new = [f"LINE {index}" for index in range(200)]
+    changes = [("replace", 0, 200, 0, 200)]
+    records = [history.ReloadCommand(changes, old, new) for _ in range(3)]
+    for record in records:
+        undo.addcmd(record, execute=False)
+    size = records[0].size
+    assert history.trim_undo(undo, size * 2) == 1
+    assert undo.pointer == len(undo.undolist) == 2
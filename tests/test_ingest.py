@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from idlereload import edits, ingest
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_file_lines_matches_split_lines() -> None:
+    for text in ("", "a", "a\n", "a\r\nb\rc\n\nd", "\n\n"):
+        lines = ingest.FileLines(text)
+        expected = edits.split_lines(text)
+        assert list(lines) == expected
+        assert len(lines) == len(expected)
+        assert lines[1:] == expected[1:]
+        assert lines[-1] == expected[-1]
+    with pytest.raises(IndexError):
+        ingest.FileLines("a\nb")[2]
+
+
+def test_read_file_decodes_with_encoding(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    path = tmp_path / "file.py"
+    data = ("\ufeff" + "nom = 'caf\xe9'\r\n" * 3).encode("utf-8")
+    path.write_bytes(data)
+    for threshold in (1 << 20, 1):
+        monkeypatch.setattr(ingest, "MMAP_THRESHOLD", threshold)
+        digest, lines, size = ingest.read_file(str(path), "utf-8-sig")
+        assert digest == ingest.hash_bytes(data)
+        assert size == len(data)
+        assert lines[0] == "nom = 'caf\xe9'"
+        assert len(lines) == 4
+    with pytest.raises(ingest.FileTooLargeError):
+        ingest.read_file(str(path), "utf-8", max_size=len(data) - 1)
@@ -1,6 +1,27 @@
 from __future__ import annotations
 
+from concurrent.futures import wait
+from idlelib.config import idleConf
+from pathlib import Path
+from tkinter import messagebox
+from typing import TYPE_CHECKING, cast
+
+import pytest
+from conftest import FakeEditorWindow
+
 import idlereload
+from idlereload.snapshot import Snapshot
+from idlereload.stats import PhaseTimer, get_records
+
+if TYPE_CHECKING:
+    from tkinter import Event, Misc
+
+    from conftest import MakeWindow
+
+    from idlereload.worker import ReloadPlan
+
+# Handlers tested here never look at their event
+EVENT = cast("Event[Misc]", None)
 
 
 def test_has_callables() -> None:
@@ -9,3 +30,392 @@ def test_has_callables() -> None:
     assert hasattr(idlereload, "idlereload")
     assert hasattr(idlereload.idlereload, "reload")
     assert callable(idlereload.idlereload.reload)
+
+
+@pytest.mark.usefixtures("settings")
+def test_reload_unchanged_file_only_marks_saved(
+    monkeypatch: pytest.MonkeyPatch,
+    make_window: MakeWindow,
+    plans: list[ReloadPlan],
+) -> None:
+    lines = ["x = 1", "y = 2", ""]
+    editwin, extension = make_window(lines, lines)
+    assert editwin.io.filename is not None
+    # First reload fingerprints what the buffer holds
+    extension.reload_file_contents(editwin.io.filename)
+    editwin.io.set_saved(False)
+    del plans[:]
+
+    def untouched(*args: object) -> None:
+        raise AssertionError("Widget was touched")
+
+    for name in ("get", "insert", "delete"):
+        monkeypatch.setattr(editwin.text, name, untouched)
+    extension.reload_file_contents(editwin.io.filename)
+    assert editwin.io.get_saved()
+    assert plans == []
+
+
+@pytest.mark.usefixtures("settings")
+def test_background_reload_sees_merged_typing(
+    monkeypatch: pytest.MonkeyPatch,
+    make_window: MakeWindow,
+) -> None:
+    monkeypatch.setattr(idlereload.idlereload, "background_diff", "True")
+    old = ["x = 1", "y = 2", ""]
+    new = ["x = 1", "y = 20", ""]
+    editwin, extension = make_window(old, new)
+    editwin.type_text("1.0", "T")
+    assert editwin.io.filename is not None
+    extension.reload_file_contents(editwin.io.filename)
+    assert extension.pending is not None
+    future = extension.pending[0]
+    wait([future])
+    # Would merge into the last insert command, changing nothing the
+    # stale check looks at
+    editwin.type_text("1.1", "Y")
+    editwin.text.run_idle()
+    assert editwin.text.get("1.0", "end-1c") == "\n".join(new)
+
+
+def applying(extension: idlereload.idlereload) -> bool:
+    """Return if extension is applying a reload progressively."""
+    return extension.applying is not None
+
+
+def snapshotting(extension: idlereload.idlereload) -> bool:
+    """Return if extension is taking a snapshot in the background."""
+    return extension.pending_snapshot is not None
+
+
+def reload_in_progress(extension: idlereload.idlereload) -> bool:
+    """Return if extension still holds state of a reload."""
+    return extension.timer is not None or extension.reload_shell_after
+
+
+class FakeClock:
+    """Clock advancing a millisecond every time it is read."""
+
+    def __init__(self) -> None:
+        """Initialize at zero."""
+        self.now = 0.0
+
+    def perf_counter(self) -> float:
+        """Return current time, then advance it."""
+        self.now += 0.001
+        return self.now
+
+
+@pytest.mark.usefixtures("settings")
+def test_cancel_progressive_reload_restores_text_and_undo(
+    monkeypatch: pytest.MonkeyPatch,
+    make_window: MakeWindow,
+) -> None:
+    monkeypatch.setattr(
+        idlereload.idlereload,
+        "progressive_threshold_lines",
+        "5",
+    )
+    monkeypatch.setattr(idlereload.idlereload, "slice_ms", "5")
+    monkeypatch.setattr(idlereload, "time", FakeClock())
+    old = [f"value_{index} = {index}" for index in range(40)] + [""]
+    # Every other line changed, so there are many separate edits
+    new = [f"value_{index} = {index * (index % 2 + 1)}" for index in range(40)]
+    new.append("")
+    editwin, extension = make_window(old, new)
+    editwin.type_text("1.0", "#")
+    editwin.io.set_saved(True)
+    original = editwin.text.get("1.0", "end-1c")
+    undolist = list(editwin.undo.undolist)
+    assert editwin.io.filename is not None
+
+    extension.reload_file_contents(editwin.io.filename)
+    editwin.text.run_one()
+    editwin.text.run_one()
+    assert applying(extension)
+    assert editwin.text.get("1.0", "end-1c") != original
+    # Undo, redo, typing and reloading are refused until it is done
+    assert editwin.text.event_generate("<<undo>>") == "break"
+    assert editwin.text.event_generate("<<redo>>") == "break"
+    editwin.type_text("1.0", "x")
+    assert extension.reload_file_event(EVENT) == "break"
+    assert editwin.io.get_saved()
+
+    extension.idlereload_cancel_reload_event(EVENT)
+    assert not applying(extension)
+    assert editwin.text.get("1.0", "end-1c") == original
+    assert editwin.undo.undolist == undolist
+    assert editwin.undo.pointer == len(undolist)
+    assert editwin.undo.undoblock == 0
+    assert editwin.per.filters() == [editwin.undo]
+    # Undo works again, and only the typing is left to undo
+    editwin.text.event_generate("<<undo>>")
+    assert editwin.text.get("1.0", "end-1c") == "\n".join(old)
+
+
+@pytest.mark.usefixtures("settings")
+def test_save_refused_during_progressive_reload(
+    monkeypatch: pytest.MonkeyPatch,
+    make_window: MakeWindow,
+) -> None:
+    monkeypatch.setattr(
+        idlereload.idlereload,
+        "progressive_threshold_lines",
+        "5",
+    )
+    monkeypatch.setattr(idlereload.idlereload, "slice_ms", "5")
+    monkeypatch.setattr(idlereload, "time", FakeClock())
+    old = [f"value_{index} = {index}" for index in range(40)] + [""]
+    # Every other line changed, so there are many separate edits
+    new = [f"value_{index} = {index * (index % 2 + 1)}" for index in range(40)]
+    new.append("")
+    editwin, extension = make_window(old, new)
+    filename = editwin.io.filename
+    assert filename is not None
+    written: list[str] = []
+
+    def write(filename: str) -> bool:
+        written.append(filename)
+        return True
+
+    extension.original_writefile = write
+    extension.reload_file_contents(filename)
+    editwin.text.run_one()
+    assert applying(extension)
+    assert not extension.writefile_hook(filename)
+    assert written == []
+    assert editwin.text.bells == 1
+    editwin.text.run_idle()
+    assert editwin.text.get("1.0", "end-1c") == "\n".join(new)
+
+
+@pytest.mark.usefixtures("settings")
+def test_close_cancels_progressive_reload(
+    monkeypatch: pytest.MonkeyPatch,
+    make_window: MakeWindow,
+) -> None:
+    monkeypatch.setattr(
+        idlereload.idlereload,
+        "progressive_threshold_lines",
+        "5",
+    )
+    monkeypatch.setattr(idlereload.idlereload, "slice_ms", "5")
+    monkeypatch.setattr(idlereload, "time", FakeClock())
+    old = [f"value_{index} = {index}" for index in range(40)] + [""]
+    # Every other line changed, so there are many separate edits
+    new = [f"value_{index} = {index * (index % 2 + 1)}" for index in range(40)]
+    new.append("")
+    editwin, extension = make_window(old, new)
+    assert editwin.io.filename is not None
+    extension.reload_file_contents(editwin.io.filename)
+    editwin.text.run_one()
+    extension.close()
+    assert editwin.text.get("1.0", "end-1c") == "\n".join(old)
+    assert editwin.undo.undoblock == 0
+    assert editwin.per.filters() == [editwin.undo]
+    assert editwin.text.bindings["<<undo>>"] == editwin.undo.undo_event
+
+
+@pytest.mark.usefixtures("settings")
+def test_config_reloaded_only_when_user_files_change(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    cls = idlereload.idlereload
+    # Signatures of one and then two user configuration files
+    signatures: list[tuple[None, ...]] = [(None,)]
+    loads: list[None] = []
+    monkeypatch.setattr(
+        idlereload,
+        "user_config_signatures",
+        lambda: signatures[-1],
+    )
+    monkeypatch.setattr(
+        idleConf,
+        "LoadCfgFiles",
+        lambda: loads.append(None),
+    )
+    monkeypatch.setattr(
+        idleConf,
+        "GetOption",
+        lambda *args, default=None, **kwargs: f"{default}-{len(signatures)}",
+    )
+    monkeypatch.setattr(cls, "ensure_config_exists", lambda: False)
+    monkeypatch.setattr(cls, "ensure_bindings_exist", lambda: False)
+    monkeypatch.setattr(cls, "config_signatures", (None,))
+
+    cls.reload()
+    assert loads == []
+    assert cls.diff_engine == "patience"
+
+    signatures.append((None, None))
+    cls.reload()
+    assert loads == [None]
+    assert cls.diff_engine == "patience-2"
+    assert cls.config_signatures == (None, None)
+
+    cls.reload()
+    assert loads == [None]
+
+
+@pytest.mark.usefixtures("settings")
+def test_reload_extensions_everywhere_reaches_every_window(
+    monkeypatch: pytest.MonkeyPatch,
+    make_window: MakeWindow,
+) -> None:
+    editwin, extension = make_window(["a"], ["a"])
+    others = [FakeEditorWindow(f"{index}", "", "utf-8") for index in range(2)]
+    # Window list knows the others, but not the window reloading
+    editwin.inversedict = dict.fromkeys(others)
+    torn_down: list[FakeEditorWindow] = []
+    loaded: list[FakeEditorWindow] = []
+    monkeypatch.setattr(idlereload, "extension_modules", lambda window: [])
+    monkeypatch.setattr(idlereload, "extension_ui", lambda window: {})
+    monkeypatch.setattr(idlereload, "teardown_extensions", torn_down.append)
+    monkeypatch.setattr(idlereload, "reload_changed", lambda roots: [])
+    monkeypatch.setattr(
+        idlereload,
+        "load_extensions",
+        lambda window, old_ui: loaded.append(window),
+    )
+
+    extension.idlereload_reload_extensions_everywhere_event(EVENT)
+    assert torn_down == [*others, editwin]
+    assert loaded == [*others, editwin]
+    assert editwin.status.startswith("Reloaded 3 windows")
+
+
+class FakeColorizer:
+    """Colorizer remembering ranges it was told to redo."""
+
+    def __init__(self) -> None:
+        """Initialize with no ranges."""
+        self.ranges: list[tuple[str, str]] = []
+
+    def notify_range(self, index1: str, index2: str) -> None:
+        """Remember range."""
+        self.ranges.append((index1, index2))
+
+
+@pytest.mark.usefixtures("settings")
+def test_reload_records_recolor_time(make_window: MakeWindow) -> None:
+    old = [f"value_{index} = {index}" for index in range(10)] + [""]
+    new = [*old[:3], "value_3 = 30", "value_4 = 40", *old[5:]]
+    editwin, extension = make_window(old, new)
+    color = FakeColorizer()
+    editwin.color = color
+    assert editwin.io.filename is not None
+    extension.timer = PhaseTimer("file", "module.py")
+    extension.reload_file_contents(editwin.io.filename)
+    editwin.text.run_idle()
+    assert color.ranges == [("4.0", "6.0")]
+    record = get_records()[-1]
+    assert {"apply", "recolor"} <= record.phases.keys()
+    assert record.counts["lines_recolored"] == 2
+    assert record.strategy == "patience"
+
+
+@pytest.mark.usefixtures("settings")
+def test_snapshot_taken_on_save_only(make_window: MakeWindow) -> None:
+    old = ["first = 1", ""]
+    editwin, extension = make_window(old, old)
+    assert editwin.io.filename is not None
+    filename = editwin.io.filename
+    # Disk might have changed since the window loaded it
+    assert not snapshotting(extension)
+    assert extension.source_lines() == old
+
+    editwin.type_text("2.0", "second = 2")
+    assert extension.source_lines() == ["first = 1", "second = 2"]
+
+    def write(filename: str) -> bool:
+        Path(filename).write_text(editwin.text.get("1.0", "end-1c"))
+        return True
+
+    extension.original_writefile = write
+    assert extension.writefile_hook(filename)
+    assert extension.pending_snapshot is not None
+    wait([extension.pending_snapshot])
+    editwin.text.run_idle()
+    snapshot = extension.source_lines()
+    assert isinstance(snapshot, Snapshot)
+    assert snapshot.lines() == ["first = 1", "second = 2"]
+
+
+@pytest.mark.usefixtures("settings")
+def test_fingerprint_survives_reloading_extensions(
+    make_window: MakeWindow,
+) -> None:
+    old = ["a = 1", "b = 2", ""]
+    editwin, extension = make_window(old, old)
+    filename = editwin.io.filename
+    assert filename is not None
+    extension.reload_file_contents(filename)
+    Path(filename).write_text("b = 3")
+    # Extensions are closed and created again, file is still changed
+    extension.close()
+    extension = idlereload.idlereload(editwin)  # type: ignore[arg-type]
+    extension.reload_file_contents(filename)
+    assert editwin.text.get("1.0", "end-1c") == "b = 3"
+
+    Path(filename).write_text("a = 10\nb = 3\nc = 4\n")
+    extension.reload_file_contents(filename)
+    assert editwin.text.get("1.0", "end-1c") == "a = 10\nb = 3\nc = 4\n"
+
+
+@pytest.mark.usefixtures("settings")
+def test_new_window_not_fingerprinted_from_disk(tmp_path: Path) -> None:
+    path = tmp_path / "module.py"
+    path.write_text("changed = True\n")
+    # Buffer holds what was loaded before the file changed
+    editwin = FakeEditorWindow("changed = False\n", str(path), "utf-8")
+    extension = idlereload.idlereload(editwin)  # type: ignore[arg-type]
+    extension.reload_file_contents(str(path))
+    assert editwin.text.get("1.0", "end-1c") == "changed = True\n"
+
+
+@pytest.mark.usefixtures("settings")
+def test_background_reload_in_subprocess(
+    monkeypatch: pytest.MonkeyPatch,
+    make_window: MakeWindow,
+) -> None:
+    monkeypatch.setattr(idlereload.idlereload, "background_diff", "True")
+    monkeypatch.setattr(idlereload.idlereload, "process_threshold_kb", "0")
+    old = ["x = 1", "y = 2", ""]
+    new = ["x = 1", "y = 20", ""]
+    editwin, extension = make_window(old, new)
+    assert editwin.io.filename is not None
+    extension.reload_file_contents(editwin.io.filename)
+    assert extension.pending is not None
+    wait([extension.pending[0]])
+    editwin.text.run_idle()
+    assert editwin.text.get("1.0", "end-1c") == "\n".join(new)
+
+
+@pytest.mark.usefixtures("settings")
+@pytest.mark.parametrize("background", ["False", "True"])
+def test_failed_reload_is_shown_and_forgotten(
+    monkeypatch: pytest.MonkeyPatch,
+    make_window: MakeWindow,
+    background: str,
+) -> None:
+    monkeypatch.setattr(idlereload.idlereload, "background_diff", background)
+    errors: list[str] = []
+    monkeypatch.setattr(
+        messagebox,
+        "showerror",
+        lambda **kwargs: errors.append(kwargs["message"]),
+    )
+    editwin, extension = make_window(["x = 1", ""], ["x = 1", ""])
+    filename = editwin.io.filename
+    assert filename is not None
+    Path(filename).write_bytes(b"x = '\xff'\n")
+    extension.reload_shell_after = True
+    extension.timer = PhaseTimer("file", "module.py")
+    extension.reload_file_contents(filename)
+    if extension.pending is not None:
+        wait([extension.pending[0]])
+    editwin.text.run_idle()
+    assert len(errors) == 1
+    assert "module.py" in errors[0]
+    assert not reload_in_progress(extension)
+    assert editwin.text.get("1.0", "end-1c") == "x = 1\n"
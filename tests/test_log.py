@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from idlereload import log
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+
+
+def test_writer_batches_and_flushes(tmp_path: Path) -> None:
+    path = tmp_path / "logs" / "test.log"
+    writer = log.LogWriter(path)
+    writer.write("first\nsecond")
+    writer.write("third\n")
+    assert writer.flush(5)
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [line.split("] ", 1)[1] for line in lines] == [
+        "first",
+        "second",
+        "third",
+    ]
+    assert writer.oldest_time() is not None
+
+
+def test_writer_rotates_big_log(tmp_path: Path) -> None:
+    path = tmp_path / "test.log"
+    writer = log.LogWriter(path, max_bytes=10, backup_count=2)
+    for message in ("one", "two", "three", "four"):
+        writer.write(message)
+        assert writer.flush(5)
+    assert path.read_text(encoding="utf-8").endswith("four\n")
+    assert (
+        (tmp_path / "test.log.1")
+        .read_text(encoding="utf-8")
+        .endswith(
+            "three\n",
+        )
+    )
+    assert (
+        (tmp_path / "test.log.2")
+        .read_text(encoding="utf-8")
+        .endswith(
+            "two\n",
+        )
+    )
+    assert not (tmp_path / "test.log.3").exists()
+
+
+def test_writer_reports_errors_as_idlereload(
+    capsys: pytest.CaptureFixture[str],
+    tmp_path: Path,
+) -> None:
+    blocker = tmp_path / "logs"
+    blocker.write_text("not a directory")
+    writer = log.LogWriter(blocker / "test.log")
+    writer.write("lost")
+    assert writer.flush(5)
+    assert capsys.readouterr().out.startswith("[idlereload] Could not write")
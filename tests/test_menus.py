@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from typing import Any
+
+from idlereload import menus
+
+
+class FakeMenu:
+    """Menu keeping items as dictionaries of options."""
+
+    def __init__(self, labels: list[str | None]) -> None:
+        """Initialize with commands, None for separators."""
+        self.items: list[dict[str, Any]] = [
+            {"type": "separator"}
+            if label is None
+            else {"type": "command", "label": label, "accelerator": ""}
+            for label in labels
+        ]
+        self.inserted = 0
+
+    def index(self, index: str) -> int | None:
+        """Return index of last item."""
+        assert index == "end"
+        return len(self.items) - 1 if self.items else None
+
+    def type(self, index: int) -> str:
+        """Return type of item."""
+        return str(self.items[index]["type"])
+
+    def entrycget(self, index: int, option: str) -> Any:
+        """Return option of item."""
+        return self.items[index][option]
+
+    def entryconfigure(self, index: int, **options: Any) -> None:
+        """Change options of item."""
+        self.items[index].update(options)
+
+    def delete(self, first: int, last: int) -> None:
+        """Delete items first to last, inclusive."""
+        del self.items[first : last + 1]
+
+    def insert_separator(self, index: int) -> None:
+        """Insert separator."""
+        self.inserted += 1
+        self.items.insert(index, {"type": "separator"})
+
+    def insert_command(self, index: int, **options: Any) -> None:
+        """Insert command."""
+        self.inserted += 1
+        self.items.insert(index, {"type": "command", **options})
+
+    def labels(self) -> list[str | None]:
+        """Return labels of items."""
+        return [item.get("label") for item in self.items]
+
+
+class FakeEditorWindow:
+    """Editor window with only a text widget."""
+
+    text = None
+
+
+def test_diff_bindings_only_changes() -> None:
+    old = {"ext": menus.ExtensionUI({}, {"<<a>>": ("<Key-a>",), "<<b>>": ()})}
+    new = {
+        "ext": menus.ExtensionUI(
+            {},
+            {"<<a>>": ("<Key-a>", "<Key-A>"), "<<c>>": ("<Key-c>",)},
+        ),
+    }
+    removed, added, gone = menus.diff_bindings(old, new)
+    assert removed == {}
+    assert added == {"<<a>>": {"<Key-A>"}, "<<c>>": {"<Key-c>"}}
+    assert gone == {"<<b>>"}
+
+
+def test_update_menu_relabels_and_inserts_in_place() -> None:
+    menu = FakeMenu(["Open", None, "Reload File", "Old Entry", "Quit"])
+    old: list[menus.MenuItem] = [
+        (None, ""),
+        (("_Reload File", "<<reload-file>>"), ""),
+        (("Old Entry", "<<old>>"), ""),
+    ]
+    new: list[menus.MenuItem] = [
+        (None, ""),
+        (("Reload _File", "<<reload-file>>"), "Ctrl+R"),
+        (("New Entry", "<<new>>"), ""),
+    ]
+    menus.update_menu(FakeEditorWindow(), menu, old, new)  # type: ignore[arg-type]
+    assert menu.labels() == ["Open", None, "Reload File", "New Entry", "Quit"]
+    assert menu.items[2]["underline"] == 7
+    assert menu.items[2]["accelerator"] == "Ctrl+R"
+    # Separator and reload entry were kept
+    assert menu.inserted == 1
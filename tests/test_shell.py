@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import importlib
+import sys
+from typing import TYPE_CHECKING
+
+from idlereload import shell
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+
+
+def test_reload_code_reloads_dependents(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    (tmp_path / "shellbase.py").write_text("class Thing:\n    VALUE = 1\n")
+    (tmp_path / "shelluses.py").write_text("from shellbase import Thing\n")
+    (tmp_path / "shellalone.py").write_text("OTHER = 1\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(sys, "dont_write_bytecode", True)
+    try:
+        importlib.import_module("shellalone")
+        uses = importlib.import_module("shelluses")
+        (tmp_path / "shellbase.py").write_text(
+            "class Thing:\n    VALUE = 200\n",
+        )
+        code = shell.reload_code(str(tmp_path / "shellbase.py"))
+        exec(code, {})  # noqa: S102
+        assert uses.Thing.VALUE == 200
+        output = capsys.readouterr().out
+        assert "Reloaded shellbase in" in output
+        assert "Reloaded shelluses in" in output
+        assert "shellalone" not in output
+    finally:
+        for name in ("shellbase", "shelluses", "shellalone"):
+            sys.modules.pop(name, None)
+
+
+def test_reload_code_reports_not_imported(
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    exec(shell.reload_code(str(tmp_path / "missing.py")), {})  # noqa: S102
+    assert "missing.py is not imported" in capsys.readouterr().out
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from idlereload import snapshot
+
+
+def test_snapshot_round_trip() -> None:
+    lines = ["def f():", "    return 1", ""]
+    taken = snapshot.Snapshot.from_lines(lines, b"digest")
+    assert taken.lines() == lines
+    assert list(taken.hashes) == [snapshot.line_hash(line) for line in lines]
+    assert taken.hashes[0] != taken.hashes[1]
+
+
+def test_store_snapshot_evicts_least_recently_used() -> None:
+    first = snapshot.Snapshot.from_lines(["a" * 100], b"1")
+    second = snapshot.Snapshot.from_lines(["b" * 100], b"2")
+    third = snapshot.Snapshot.from_lines(["c" * 100], b"3")
+    limit = first.size + second.size
+    try:
+        snapshot.store_snapshot("first", first, limit)
+        snapshot.store_snapshot("second", second, limit)
+        assert snapshot.get_snapshot("first") is first
+        snapshot.store_snapshot("third", third, limit)
+        assert snapshot.get_snapshot("second") is None
+        assert snapshot.get_snapshot("first") is first
+        assert snapshot.get_snapshot("third") is third
+    finally:
+        for key in ("first", "second", "third"):
+            snapshot.forget_snapshot(key)
+
+
+def test_intern_hashes_shares_ids() -> None:
+    hashes = [snapshot.line_hash(line) for line in ("a", "b", "a", "c")]
+    first, second = snapshot.intern_hashes(hashes[:3], hashes[1:])
+    assert first[0] == first[2] == second[1]
+    assert first[1] == second[0]
+    assert len({first[0], first[1], second[2]}) == 3
+
+
+def test_intern_hashes_starts_over_every_call() -> None:
+    hashes = [snapshot.line_hash(line) for line in ("a", "b")]
+    assert list(snapshot.intern_hashes(hashes)[0]) == [0, 1]
+    assert list(snapshot.intern_hashes(hashes[1:])[0]) == [0]
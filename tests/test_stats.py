@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+from idlereload import stats
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_percentile_nearest_rank() -> None:
+    values = [float(value) for value in range(1, 101)]
+    assert stats.percentile(values, 50) == 50
+    assert stats.percentile(values, 99) == 99
+    assert stats.percentile([], 50) == 0
+    assert stats.percentile([3.0], 90) == 3
+
+
+def test_phase_timer_records_and_exports(tmp_path: Path) -> None:
+    timer = stats.PhaseTimer("file", "example.py")
+    with timer.phase("read"):
+        pass
+    timer.add("read", 0.5)
+    timer.counts["lines_changed"] = 3
+    timer.strategy = "block (timeout)"
+    record = timer.finish(2)
+    assert record.phases["read"] >= 0.5
+    assert stats.get_records()[-1] is record
+    for _ in range(3):
+        stats.PhaseTimer("file", "other.py").finish(2)
+    assert len(stats.get_records()) == 2
+
+    summary = stats.summarize([record])
+    assert "File reloads: 1" in summary
+    assert "lines_changed" in summary
+    assert "block (timeout)" in summary
+
+    path = tmp_path / "stats.jsonl"
+    assert stats.export_json_lines(path, [record]) == 1
+    exported = json.loads(path.read_text())
+    assert exported["name"] == "example.py"
+    assert exported["counts"] == {"lines_changed": 3}
+    assert exported["strategy"] == "block (timeout)"
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import os
+import sys
+import time
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from idlereload import watch
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+linux_only = pytest.mark.skipif(
+    not sys.platform.startswith("linux"),
+    reason="inotify is Linux only",
+)
+
+
+class FakeTk:
+    """Tk interpreter recording file handlers."""
+
+    def __init__(self) -> None:
+        """Initialize without handlers."""
+        self.handlers: dict[int, Callable[[int, int], object]] = {}
+
+    def createfilehandler(
+        self,
+        fd: int,
+        mask: int,
+        callback: Callable[[int, int], object],
+    ) -> None:
+        """Record file handler."""
+        self.handlers[fd] = callback
+
+    def deletefilehandler(self, fd: int) -> None:
+        """Forget file handler."""
+        del self.handlers[fd]
+
+
+class FakeRoot:
+    """Widget with after scheduling run by hand."""
+
+    def __init__(self) -> None:
+        """Initialize with nothing scheduled."""
+        self.tk = FakeTk()
+        self.scheduled: dict[str, Callable[[], object]] = {}
+
+    def after(self, ms: int, callback: Callable[[], object]) -> str:
+        """Schedule callback, return id."""
+        id_ = f"after#{len(self.scheduled)}"
+        self.scheduled[id_] = callback
+        return id_
+
+    def after_cancel(self, id_: str) -> None:
+        """Cancel scheduled callback."""
+        del self.scheduled[id_]
+
+    def run_scheduled(self) -> None:
+        """Run everything scheduled so far."""
+        scheduled = list(self.scheduled.values())
+        self.scheduled.clear()
+        for callback in scheduled:
+            callback()
+
+
+@linux_only
+def test_watcher_debounces_writes(tmp_path: Path) -> None:
+    root = FakeRoot()
+    watcher = watch.InotifyWatcher(root)  # type: ignore[arg-type]
+    watched = tmp_path / "watched.py"
+    watched.write_text("a = 1\n")
+    changed: list[str] = []
+    watcher.watch(str(watched), changed.append)
+    try:
+        for value in range(3):
+            watched.write_text(f"a = {value}\n")
+        # Not watched, must not be reported
+        (tmp_path / "other.py").write_text("b = 2\n")
+        replacement = tmp_path / "replacement.tmp"
+        replacement.write_text("a = 4\n")
+        replacement.replace(watched)
+
+        root.tk.handlers[watcher.fd](watcher.fd, 0)
+        assert changed == []
+        assert len(root.scheduled) == 1
+        root.run_scheduled()
+        assert changed == [str(watched)]
+    finally:
+        watcher.unwatch(str(watched), changed.append)
+    # Closed once nothing is watched
+    assert watcher.closed
+    assert not root.tk.handlers
+
+
+@linux_only
+def test_unwatch_keeps_other_callbacks(tmp_path: Path) -> None:
+    root = FakeRoot()
+    watcher = watch.InotifyWatcher(root)  # type: ignore[arg-type]
+    watched = str(tmp_path / "watched.py")
+    first: list[Any] = []
+    second: list[Any] = []
+    watcher.watch(watched, first.append)
+    watcher.watch(watched, second.append)
+    watcher.unwatch(watched, first.append)
+    assert not watcher.closed
+    assert watcher.callbacks == {watched: [second.append]}
+    watcher.close()
+
+
+def test_stat_scheduler_reports_changes(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(watch, "MIN_POLL_INTERVAL", 0.01)
+    root = FakeRoot()
+    scheduler = watch.StatScheduler(root)  # type: ignore[arg-type]
+    watched = tmp_path / "watched.py"
+    watched.write_text("a = 1\n")
+    changed: list[str] = []
+    scheduler.watch(str(watched), changed.append)
+    try:
+        deadline = time.monotonic() + 5
+        while not scheduler.entries[str(watched)].known:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        watched.write_text("a = 10\n")
+        while not scheduler.changed:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        root.run_scheduled()
+        assert changed == [str(watched)]
+    finally:
+        scheduler.unwatch(str(watched), changed.append)
+    assert scheduler.closed
+    assert not root.scheduled
+
+
+def test_signature_sees_same_size_rewrite_and_replace(tmp_path: Path) -> None:
+    watched = tmp_path / "watched.py"
+    watched.write_text("a = 1\n")
+    first = watch.get_signature(str(watched), 0)
+    assert first is not None
+    assert not watch.signature_changed(
+        first,
+        watch.get_signature(str(watched), 0),
+    )
+
+    os.utime(watched, ns=(first.mtime_ns, first.mtime_ns + 1))
+    touched = watch.get_signature(str(watched), 0)
+    assert touched is not None
+    assert watch.signature_changed(first, touched)
+    assert touched.same_file(first)
+
+    replacement = tmp_path / "replacement.tmp"
+    replacement.write_text("a = 2\n")
+    replacement.replace(watched)
+    replaced = watch.get_signature(str(watched), 0)
+    assert replaced is not None
+    assert watch.signature_changed(touched, replaced)
+    assert not replaced.same_file(touched)
+
+    watched.unlink()
+    assert watch.signature_changed(
+        replaced,
+        watch.get_signature(str(watched), 0),
+    )